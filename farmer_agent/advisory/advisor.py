@@ -65,6 +65,13 @@ def get_crop_advice(crop_name, soil_type=None):
     advice['llm_advice'] = call_llm(llm_prompt)
 
     # Also return a formatted string for CLI/print
+    advice['formatted'] = format_advice(advice)
+    return advice
+
+def format_advice(advice):
+    """
+    The advisory's fields as display text (the 'formatted' entry of get_crop_advice's result).
+    """
     lines = [
         f"Crop: {advice['crop']}",
         f"Recommended Soil: {advice['recommended_soil']}",
@@ -82,8 +89,7 @@ def get_crop_advice(crop_name, soil_type=None):
             lines.append(f"- {inst}")
     lines.append("\nLLM Expert Advice:")
     lines.append(advice['llm_advice'])
-    advice['formatted'] = "\n".join(lines)
-    return advice
+    return "\n".join(lines)
 
 if __name__ == "__main__":
     # Example usage
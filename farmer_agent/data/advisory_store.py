@@ -0,0 +1,103 @@
+# Advisory Blob Store (Offline)
+# Content-addressed, compressed storage for advisories kept in user history. Each distinct
+# advisory is stored once as a zlib-compressed JSON blob named by its SHA-256, so the same
+# advice given to many farmers (or many times) costs one blob, and history records hold only
+# the hash. The 'formatted' text is dropped when it can be rebuilt from the other fields, and
+# per-query 'feedback' stays with the query record rather than the shared blob.
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+ADVISORY_DIR = os.path.join(DATA_DIR, 'advisories')
+# Decoded advisories kept in memory
+CACHE_SIZE = 128
+
+
+def _rebuilt_formatted(advisory):
+    """format_advice() of an advisory, or None if it does not have the advisor's fields."""
+    from farmer_agent.advisory.advisor import format_advice
+    try:
+        return format_advice(advisory)
+    except (KeyError, TypeError):
+        return None
+
+
+class AdvisoryStore:
+    def __init__(self, directory=ADVISORY_DIR, cache_size=CACHE_SIZE):
+        self.directory = directory
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._known = set()
+
+    def _path(self, ref):
+        return os.path.join(self.directory, ref[:2], f"{ref}.json.z")
+
+    @staticmethod
+    def split(advisory):
+        """(shared advisory payload, per-query feedback) for an advisory dict."""
+        payload = dict(advisory)
+        feedback = payload.pop('feedback', None)
+        formatted = payload.pop('formatted', None)
+        if formatted is not None:
+            if formatted == _rebuilt_formatted(payload):
+                payload['_formatted'] = True
+            else:
+                payload['formatted'] = formatted
+        return payload, feedback
+
+    def put(self, payload):
+        """Store a payload from split() unless an identical one exists; returns its hash."""
+        data = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        ref = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if ref in self._known:
+                return ref
+        path = self._path(ref)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_file = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(zlib.compress(data, 9))
+            os.replace(tmp_file, path)
+        with self._lock:
+            self._known.add(ref)
+        return ref
+
+    def get(self, ref):
+        """The advisory stored under a hash, with 'formatted' rebuilt (None if missing)."""
+        with self._lock:
+            if ref in self._cache:
+                self._cache.move_to_end(ref)
+                return dict(self._cache[ref])
+        try:
+            with open(self._path(ref), 'rb') as f:
+                advisory = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error) as e:
+            print(f"Advisory blob {ref[:12]} unreadable: {e}")
+            return None
+        if advisory.pop('_formatted', False):
+            advisory['formatted'] = _rebuilt_formatted(advisory)
+        with self._lock:
+            self._known.add(ref)
+            self._cache[ref] = advisory
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(advisory)
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_advisory_store():
+    """Process-wide advisory blob store shared by every user profile."""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = AdvisoryStore()
+        return _shared_store
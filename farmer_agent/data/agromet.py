@@ -0,0 +1,238 @@
+# Agro-meteorological Indices (Offline)
+# Vectorized growing degree days, reference evapotranspiration (Hargreaves, FAO-56) and a daily
+# soil water balance that turns weather series into deterministic irrigation schedules.
+# Daily inputs are (plots, days) arrays sharing one calendar; per-plot values are (plots,) arrays.
+# weather_series() turns a forecast or a list of weather observations into those arrays.
+import json
+import os
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'config')
+CROPS_FILE = os.path.join(CONFIG_DIR, 'crops.json')
+SOIL_FILE = os.path.join(DATA_DIR, 'soil_data.json')
+
+SOLAR_CONSTANT = 0.0820          # MJ m-2 min-1
+DEFAULT_WATER_MM_PER_M = 140.0   # available water when the soil type is unknown (medium loam)
+DEFAULT_DIURNAL_RANGE = 10.0     # °C, used when only mean temperature is known (e.g. climate normals)
+MIN_IRRIGATION_MM = 5.0          # smaller top-ups are not worth scheduling
+
+
+def load_json(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def crop_parameters(crop_name):
+    """The 'agromet' block for a crop from crops.json (case-insensitive), or None."""
+    crops = load_json(CROPS_FILE)
+    key = next((k for k in crops if k.lower() == str(crop_name).lower()), None)
+    return crops[key].get('agromet') if key else None
+
+
+def soil_water_capacity(soil_type=None):
+    """Available water (mm per metre of root zone) for a soil type from soil_data.json."""
+    if soil_type:
+        soils = load_json(SOIL_FILE)
+        key = next((k for k in soils if k.lower() == soil_type.lower()), None)
+        if key and 'available_water_mm_per_m' in soils[key]:
+            return float(soils[key]['available_water_mm_per_m'])
+    return DEFAULT_WATER_MM_PER_M
+
+
+def growing_degree_days(tmin, tmax, tbase, tupper=None):
+    """
+    Daily growing degree days by the capped average method: tmax is capped at tupper,
+    tmin is floored at tbase. tbase/tupper broadcast (e.g. (plots, 1) for per-plot crops).
+    """
+    tmin = np.asarray(tmin, dtype=np.float64)
+    tmax = np.asarray(tmax, dtype=np.float64)
+    if tupper is not None:
+        tmax = np.minimum(tmax, tupper)
+    tmin = np.maximum(tmin, tbase)
+    return np.maximum((tmax + tmin) / 2.0 - tbase, 0.0)
+
+
+def extraterrestrial_radiation(lat, day_of_year):
+    """FAO-56 eq. 21: daily extraterrestrial radiation Ra (MJ m-2 day-1)."""
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    j = np.asarray(day_of_year, dtype=np.float64)
+    dr = 1 + 0.033 * np.cos(2 * np.pi * j / 365)
+    delta = 0.409 * np.sin(2 * np.pi * j / 365 - 1.39)
+    ws = np.arccos(np.clip(-np.tan(phi) * np.tan(delta), -1.0, 1.0))
+    return (24 * 60 / np.pi) * SOLAR_CONSTANT * dr * (
+        ws * np.sin(phi) * np.sin(delta) + np.cos(phi) * np.cos(delta) * np.sin(ws))
+
+
+def hargreaves_et0(tmin, tmax, lat, day_of_year, tmean=None):
+    """FAO-56 eq. 52: Hargreaves reference evapotranspiration ET0 (mm/day)."""
+    tmin = np.asarray(tmin, dtype=np.float64)
+    tmax = np.asarray(tmax, dtype=np.float64)
+    if tmean is None:
+        tmean = (tmin + tmax) / 2.0
+    ra = extraterrestrial_radiation(lat, day_of_year)
+    # 0.408 converts MJ m-2 day-1 to mm/day of evaporation
+    return np.maximum(0.0023 * (tmean + 17.8) * np.sqrt(np.maximum(tmax - tmin, 0.0)) * 0.408 * ra, 0.0)
+
+
+def crop_coefficient(params, days_after_sowing):
+    """
+    FAO-56 single crop coefficient curve: flat Kc ini, linear rise to Kc mid, flat mid season,
+    linear fall to Kc end. Days before sowing or after harvest get Kc 0.
+    """
+    stages = params['stage_days']
+    kc = params['kc']
+    d = np.asarray(days_after_sowing, dtype=np.float64)
+    ends = np.cumsum([stages['ini'], stages['dev'], stages['mid'], stages['late']])
+    curve = np.interp(d, [0, ends[0], ends[1], ends[2], ends[3]],
+                      [kc['ini'], kc['ini'], kc['mid'], kc['mid'], kc['end']])
+    return np.where((d >= 0) & (d <= ends[3]), curve, 0.0)
+
+
+def soil_water_balance(etc, rain, taw, raw, initial_depletion=0.0):
+    """
+    Daily root-zone water balance (FAO-56 ch. 8) with irrigation back to field capacity
+    whenever depletion would exceed the readily available water (raw).
+    etc, rain: (plots, days); taw, raw: (plots,). Rain beyond field capacity drains away.
+    Returns (depletion, irrigation) arrays of shape (plots, days), in mm.
+    """
+    etc = np.asarray(etc, dtype=np.float64)
+    rain = np.asarray(rain, dtype=np.float64)
+    plots, days = etc.shape
+    taw = np.broadcast_to(np.asarray(taw, dtype=np.float64), (plots,))
+    raw = np.broadcast_to(np.asarray(raw, dtype=np.float64), (plots,))
+    depletion = np.empty((plots, days))
+    irrigation = np.zeros((plots, days))
+    dr = np.broadcast_to(np.asarray(initial_depletion, dtype=np.float64), (plots,)).copy()
+    for t in range(days):
+        dr = np.clip(dr - rain[:, t] + etc[:, t], 0.0, taw)
+        need = (dr > raw) & (dr >= MIN_IRRIGATION_MM)
+        irrigation[need, t] = dr[need]
+        dr[need] = 0.0
+        depletion[:, t] = dr
+    return depletion, irrigation
+
+
+def run_plots(crop, dates, tmin, tmax, rain, lat, sowing_dates, soil_type=None):
+    """
+    Compute GDD, ET0, crop ET, root-zone depletion and irrigation for many plots of one crop.
+    dates: (days,) datetime64[D]; tmin, tmax, rain: (plots, days); lat, sowing_dates: (plots,).
+    Returns a dict of (plots, days) arrays: gdd (cumulative since sowing), et0, etc, depletion, irrigation.
+    """
+    params = crop_parameters(crop) if isinstance(crop, str) else crop
+    if not params:
+        raise ValueError(f"No agromet parameters for crop: {crop}")
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    sowing = np.asarray(sowing_dates, dtype='datetime64[D]').reshape(-1, 1)
+    das = (dates[None, :] - sowing).astype(np.int64)
+    doy = (dates - dates.astype('datetime64[Y]')).astype(np.int64) + 1
+    lat = np.asarray(lat, dtype=np.float64).reshape(-1, 1)
+    et0 = hargreaves_et0(tmin, tmax, lat, doy[None, :])
+    etc = et0 * crop_coefficient(params, das)
+    daily_gdd = np.where(das >= 0, growing_degree_days(tmin, tmax, params['tbase'], params.get('tupper')), 0.0)
+    taw = soil_water_capacity(soil_type) * params['root_depth_m']
+    raw = params['depletion_fraction'] * taw
+    depletion, irrigation = soil_water_balance(etc, rain, taw, raw)
+    return {
+        'gdd': np.cumsum(daily_gdd, axis=1),
+        'et0': et0,
+        'etc': etc,
+        'depletion': depletion,
+        'irrigation': irrigation,
+    }
+
+
+def irrigation_events(result, dates):
+    """Turn run_plots output into per-plot lists of {'date', 'amount_mm'} irrigation events."""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    plots, days = np.nonzero(result['irrigation'])
+    events = [[] for _ in range(result['irrigation'].shape[0])]
+    for p, d in zip(plots, days):
+        events[p].append({'date': str(dates[d]), 'amount_mm': round(float(result['irrigation'][p, d]), 1)})
+    return events
+
+
+def weather_series(weather, plots=1, diurnal_range=DEFAULT_DIURNAL_RANGE):
+    """
+    (dates, tmin, tmax, rain) for run_plots from one location's weather: a ForecastSeries, its
+    daily() dict, or a list of WeatherObservation (observed or forecast). Observations are grouped
+    by UTC day; when a day has only mean temperatures, tmin/tmax are spread by diurnal_range.
+    Days missing inside the range (or with NaN values) get interpolated temperatures and no
+    rain. The daily arrays are repeated for `plots` rows.
+    """
+    if hasattr(weather, 'daily'):
+        weather = weather.daily()
+    if isinstance(weather, dict):
+        days = np.asarray(weather['date'], dtype='datetime64[D]')
+        tmin = np.asarray(weather['temp_min'], dtype=np.float64)
+        tmax = np.asarray(weather['temp_max'], dtype=np.float64)
+        rain = np.nan_to_num(np.asarray(weather['rainfall'], dtype=np.float64))
+    else:
+        found = [o for o in weather if o.observed_at is not None and o.temperature is not None]
+        obs_days = np.array([int(o.observed_at) // 86400 for o in found], dtype='datetime64[D]')
+        temps = np.array([o.temperature for o in found], dtype=np.float64)
+        rains = np.array([o.rainfall or 0.0 for o in found], dtype=np.float64)
+        days, group = np.unique(obs_days, return_inverse=True)
+        tmin = np.full(len(days), np.inf)
+        tmax = np.full(len(days), -np.inf)
+        rain = np.zeros(len(days))
+        np.minimum.at(tmin, group, temps)
+        np.maximum.at(tmax, group, temps)
+        np.add.at(rain, group, rains)
+        narrow = tmax - tmin < diurnal_range
+        mean = (tmin + tmax) / 2.0
+        tmin = np.where(narrow, np.minimum(tmin, mean - diurnal_range / 2.0), tmin)
+        tmax = np.where(narrow, np.maximum(tmax, mean + diurnal_range / 2.0), tmax)
+    if not len(days):
+        raise ValueError("No daily weather to run on")
+    dates = np.arange(days[0], days[-1] + 1)
+    offsets = (days - days[0]).astype(np.int64)
+    steps = np.arange(len(dates))
+    full_rain = np.zeros(len(dates))
+    full_rain[offsets] = rain
+
+    def rows(values):
+        # Days without a value (missing or NaN) are interpolated from the neighbouring days
+        known = ~np.isnan(values)
+        if not known.any():
+            raise ValueError("No temperatures in the weather to run on")
+        return np.tile(np.interp(steps, offsets[known], values[known]), (plots, 1))
+    return dates, rows(tmin), rows(tmax), np.tile(full_rain, (plots, 1))
+
+
+def run_weather(crop, weather, lat, sowing_dates, soil_type=None):
+    """
+    run_plots on a location's observed or forecast weather (see weather_series) for plots sown
+    on sowing_dates. Returns (dates, result); 'gdd' accumulates from the first weather day.
+    """
+    sowing_dates = np.atleast_1d(np.asarray(sowing_dates, dtype='datetime64[D]'))
+    dates, tmin, tmax, rain = weather_series(weather, plots=len(sowing_dates))
+    lat = np.broadcast_to(np.asarray(lat, dtype=np.float64), (len(sowing_dates),))
+    return dates, run_plots(crop, dates, tmin, tmax, rain, lat, sowing_dates, soil_type)
+
+
+def normals_series(lat, lon, dates, diurnal_range=DEFAULT_DIURNAL_RANGE):
+    """
+    Daily (tmin, tmax, rain) arrays of shape (plots, days) from the gridded climate normals,
+    for planning beyond the forecast horizon.
+    """
+    from farmer_agent.data.climate_normals import get_climate_normals
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    doy = (dates - dates.astype('datetime64[Y]')).astype(np.int64) + 1
+    daily = get_climate_normals().daily(np.asarray(lat).reshape(-1, 1), np.asarray(lon).reshape(-1, 1), doy[None, :])
+    half = diurnal_range / 2.0
+    return daily['temperature'] - half, daily['temperature'] + half, daily['rainfall']
+
+
+if __name__ == "__main__":
+    start = np.datetime64('2025-11-01')
+    dates = start + np.arange(150)
+    lat = np.array([28.6, 30.9, 26.9])
+    lon = np.array([77.2, 75.9, 75.8])
+    tmin, tmax, rain = normals_series(lat, lon, dates)
+    result = run_plots('Wheat', dates, tmin, tmax, rain, lat, [start] * 3, soil_type='Loam')
+    print("Season ET0 (mm):", result['et0'].sum(axis=1).round(0))
+    print("Season GDD:", result['gdd'][:, -1].round(0))
+    for plot, events in enumerate(irrigation_events(result, dates)):
+        print(f"Plot {plot}: {len(events)} irrigations", events[:3])
@@ -1,11 +1,8 @@
 # Basic Data Analytics (Offline)
 # Summarizes user activity, crop trends, and advisory effectiveness
-import json
-import os
 from collections import Counter
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
-HISTORY_FILE = os.path.join(DATA_DIR, 'user_history.json')
+from farmer_agent.data.user_profile import load_all_histories, resolve_record
 
 class Analytics:
     def feedback_trends(self, username=None):
@@ -78,17 +75,14 @@ class Analytics:
         self.data = self.load_history()
 
     def load_history(self):
-        if not os.path.exists(HISTORY_FILE):
-            return {}
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_all_histories()
 
     def user_activity_summary(self, username):
         user = self.data.get(username, {})
         queries = user.get('queries', [])
         return {
             'total_queries': len(queries),
-            'last_query': queries[-1] if queries else None
+            'last_query': resolve_record(queries[-1]) if queries else None
         }
 
     def crop_trends(self):
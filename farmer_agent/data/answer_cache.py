@@ -0,0 +1,154 @@
+# LLM Answer Cache (Offline)
+# Stores LLM answers per model, language and normalized question so repeat questions are served instantly
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+from farmer_agent.utils.file_utils import file_lock
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+ANSWER_CACHE_FILE = os.path.join(DATA_DIR, 'llm_answer_cache.json')
+
+# Hit/miss counters are written out every this many lookups (and on every new answer)
+STATS_FLUSH_EVERY = 20
+
+
+def normalize_question(text):
+    """Lower-case, drop punctuation and collapse whitespace so trivial rewordings share a key."""
+    text = re.sub(r'[^\w\s]', ' ', text.lower())
+    return ' '.join(text.split())
+
+
+class AnswerCache:
+    """
+    The app and the FAQ warmer (a separate process) share the cache file. Every save takes a
+    file lock, re-reads the file and merges: entries written by this process since its last
+    save win, everything else on disk is kept, and hit/miss counts are added as deltas.
+    Lookups pick up entries other processes saved once the file's modification time changes.
+    """
+
+    def __init__(self, path=ANSWER_CACHE_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._unsaved_lookups = 0
+        self._dirty = set()
+        self._stats_delta = {'hits': 0, 'misses': 0}
+        self._mtime = None
+        data = self.load_cache()
+        self.entries = data.get('entries', {})
+        self.stats = data.get('stats', {'hits': 0, 'misses': 0})
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load_cache(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            self._mtime = self._file_mtime()
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _merge(self, data):
+        """Fold what is on disk into memory, keeping this process's unsaved entries and counts; call with the lock held."""
+        entries = data.get('entries', {})
+        entries.update({key: self.entries[key] for key in self._dirty if key in self.entries})
+        self.entries = entries
+        stats = data.get('stats', {'hits': 0, 'misses': 0})
+        self.stats = {k: stats.get(k, 0) + self._stats_delta[k] for k in ('hits', 'misses')}
+
+    def reload(self):
+        """Pick up entries saved by other processes if the file changed since it was last read."""
+        with self._lock:
+            if self._file_mtime() != self._mtime:
+                self._merge(self.load_cache())
+
+    def save_cache(self):
+        lock_path = self.path + ".lock"
+        try:
+            with self._lock, file_lock(lock_path):
+                self._merge(self.load_cache())
+                data = {'entries': dict(self.entries), 'stats': dict(self.stats)}
+                tmp_file = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_file, self.path)
+                self._mtime = self._file_mtime()
+                self._dirty.clear()
+                self._stats_delta = {'hits': 0, 'misses': 0}
+                self._unsaved_lookups = 0
+        except OSError as e:
+            print(f"Answer cache save error: {e}")
+
+    @staticmethod
+    def make_key(question, lang='en', model="phi3:mini"):
+        return f"{model}|{lang}|{normalize_question(question)}"
+
+    def contains(self, question, lang='en', model="phi3:mini"):
+        """Check for a cached answer without counting it as live traffic."""
+        self.reload()
+        entry = self.entries.get(self.make_key(question, lang, model))
+        return bool(entry and entry['answer'])
+
+    def get(self, question, lang='en', model="phi3:mini"):
+        """Return the cached answer or None, recording the lookup as a hit or miss."""
+        self.reload()
+        with self._lock:
+            entry = self.entries.get(self.make_key(question, lang, model))
+            # Empty answers (failed generations cached by older versions) count as misses
+            if entry and not entry['answer']:
+                entry = None
+            outcome = 'hits' if entry else 'misses'
+            self.stats[outcome] += 1
+            self._stats_delta[outcome] += 1
+            self._unsaved_lookups += 1
+            flush = self._unsaved_lookups >= STATS_FLUSH_EVERY
+        if flush:
+            self.save_cache()
+        return entry['answer'] if entry else None
+
+    def put(self, question, answer, lang='en', model="phi3:mini", source='live', save=True):
+        """Cache an answer; empty answers are not stored so the question is asked again."""
+        if not answer or not answer.strip():
+            return
+        key = self.make_key(question, lang, model)
+        with self._lock:
+            self.entries[key] = {
+                'answer': answer,
+                'source': source,
+                'created_at': datetime.now(timezone.utc).isoformat()
+            }
+            self._dirty.add(key)
+        if save:
+            self.save_cache()
+
+    def hit_rate(self):
+        """Share of live lookups answered from the cache, or None if there were none."""
+        total = self.stats.get('hits', 0) + self.stats.get('misses', 0)
+        return self.stats.get('hits', 0) / total if total else None
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """Process-wide answer cache, so short-lived FAQ objects don't reload the file."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = AnswerCache()
+        return _shared_cache
+
+
+if __name__ == "__main__":
+    cache = get_answer_cache()
+    print("Cached answers:", len(cache.entries))
+    print("Live hit rate:", cache.hit_rate())
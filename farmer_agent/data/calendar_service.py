@@ -0,0 +1,172 @@
+# Calendar Service (Offline)
+# One long-lived CropCalendar and reminder writer per process, shared by the UI and its worker
+# threads. The calendar is loaded once; reminder changes are queued and written together once
+# edits pause for FLUSH_DELAY seconds (or after MAX_FLUSH_DELAY at the latest), so a burst of
+# edits costs one batch write. Reads flush first, so callers always see their own changes.
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from farmer_agent.data.crop_calendar import CropCalendar, Reminders
+from farmer_agent.data.reminder_store import check_rule
+
+FLUSH_DELAY = 0.5
+MAX_FLUSH_DELAY = 2.0
+
+
+class BufferedReminders(Reminders):
+    """Reminders whose changes go through the service's write queue."""
+
+    def __init__(self, service, store=None, user=None):
+        super().__init__(store=store, user=user)
+        self.service = service
+
+    def add_reminder(self, crop, activity, days_from_now):
+        date = self.service.date_from_now(days_from_now)
+        self.service.enqueue('add', (crop, activity, date, False), self.user)
+
+    def add_recurring_reminder(self, crop, activity, start_in_days, interval_days, occurrences, until=None):
+        start = self.service.date_from_now(start_in_days)
+        # Validate now: the queued write runs later on the flush thread
+        check_rule(start, interval_days, occurrences, until)
+        self.service.enqueue('rule', (crop, activity, start, interval_days, occurrences, until), self.user)
+
+    def delete_reminder(self, crop, activity=None, date=None):
+        self.service.enqueue('delete', (crop, activity, date), self.user)
+
+    def load_reminders(self):
+        self.service.flush()
+        return super().load_reminders()
+
+    def search_reminders(self, crop=None, activity=None, upcoming_only=True):
+        self.service.flush()
+        return super().search_reminders(crop, activity, upcoming_only)
+
+    def get_upcoming(self):
+        self.service.flush()
+        return super().get_upcoming()
+
+
+class CalendarService:
+    """
+    Thread-safe access to the shared calendar and reminders. Calendar methods (get_schedule,
+    next_activity, activities_between, add_plots, ...) can be called on the service directly
+    and run under its lock; `reminders` is a Reminders whose writes are coalesced.
+    """
+
+    def __init__(self, calendar=None, store=None, user=None, delay=FLUSH_DELAY, max_delay=MAX_FLUSH_DELAY):
+        self._lock = threading.RLock()
+        self.calendar = calendar or CropCalendar()
+        self.delay = delay
+        self.max_delay = max_delay
+        self._pending = []
+        self._first_pending = None
+        self._timer = None
+        self.reminders = BufferedReminders(self, store=store, user=user)
+
+    def __getattr__(self, name):
+        if name == 'calendar':
+            raise AttributeError(name)
+        attr = getattr(self.calendar, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return locked
+
+    @staticmethod
+    def date_from_now(days):
+        return (datetime.now() + timedelta(days=days)).strftime('%Y-%m-%d')
+
+    def enqueue(self, op, args, user=''):
+        """Queue one reminder change and (re)arm the debounced flush."""
+        with self._lock:
+            now = time.monotonic()
+            self._pending.append((op, args, user))
+            if self._first_pending is None:
+                self._first_pending = now
+            wait = min(self.delay, max(self._first_pending + self.max_delay - now, 0))
+            self._arm(wait)
+
+    def _arm(self, wait):
+        """(Re)start the flush timer; call with the lock held."""
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(wait, self._timed_flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _timed_flush(self):
+        """Timer callback: a failed write stays queued and is retried after max_delay."""
+        try:
+            self.flush()
+        except Exception as e:
+            logging.error(f"Reminder flush failed, retrying in {self.max_delay}s: {e}")
+            with self._lock:
+                if self._pending and self._timer is None:
+                    self._arm(self.max_delay)
+
+    def flush(self):
+        """
+        Write every queued reminder change now (also call on shutdown); consecutive additions
+        go in one batch. Returns the number of changes written. If a write fails, the changes
+        not yet written are put back at the front of the queue before the error is raised.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            first_pending, self._first_pending = self._first_pending, None
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            store = self.reminders.store
+            batch, batch_user = [], None
+            written = 0
+            try:
+                for i, (op, args, user) in enumerate(pending + [(None, None, None)]):
+                    if batch and (op != 'add' or user != batch_user):
+                        store.add_many(batch, user=batch_user)
+                        written = i
+                        batch = []
+                    if op == 'add':
+                        batch.append(args)
+                        batch_user = user
+                    elif op == 'rule':
+                        crop, activity, start, interval_days, count, until = args
+                        store.add_rule(crop, activity, start, interval_days, count=count, until=until, user=user)
+                        written = i + 1
+                    elif op == 'delete':
+                        store.delete(*args, user=user)
+                        written = i + 1
+            except Exception:
+                self._pending[:0] = pending[written:]
+                self._first_pending = first_pending or time.monotonic()
+                raise
+            return len(pending)
+
+    def schedule_reminders(self, rows, from_date=None):
+        """CropCalendar.schedule_reminders into the shared reminders, after queued changes."""
+        with self._lock:
+            self.flush()
+            return self.calendar.schedule_reminders(rows, self.reminders, from_date)
+
+    def update_weather(self, dates, tmin, tmax, forecast=None, from_date=None):
+        """CropCalendar.update_weather, moving stage reminders in the shared reminders."""
+        with self._lock:
+            self.flush()
+            return self.calendar.update_weather(dates, tmin, tmax, forecast, self.reminders, from_date)
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def get_calendar_service():
+    """Process-wide calendar service (calendar loaded on first use)."""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = CalendarService()
+        return _shared_service
@@ -0,0 +1,115 @@
+# Gridded Climate Normals (Offline)
+# Monthly temperature, humidity and rainfall normals on a regular lat/lon grid covering India.
+# The grid is memory-mapped, so loading it costs almost nothing until values are read,
+# and lookups are vectorized: thousands of plots are interpolated in one NumPy call.
+import json
+import os
+import threading
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+NORMALS_FILE = os.path.join(DATA_DIR, 'climate_normals.npy')
+STATIONS_FILE = os.path.join(DATA_DIR, 'climate_stations.json')
+
+# Grid geometry: cell (i, j) is at (GRID_LAT0 + i * GRID_STEP, GRID_LON0 + j * GRID_STEP)
+GRID_LAT0 = 6.0
+GRID_LON0 = 68.0
+GRID_STEP = 1.0
+GRID_SHAPE = (32, 31)  # 6-37°N, 68-98°E
+VARIABLES = ('temperature', 'humidity', 'rainfall')
+
+# Mid-month day of year (non-leap) and mean month length, for daily interpolation
+MID_MONTH_DOY = np.array([15.5, 45.0, 74.5, 105.0, 135.5, 166.0, 196.5, 227.5, 258.0, 288.5, 319.0, 349.5])
+MEAN_MONTH_DAYS = 365.25 / 12
+
+
+def build_grid(stations_file=STATIONS_FILE, output_file=NORMALS_FILE, power=2.0):
+    """
+    Build the normals grid from station normals by inverse-distance weighting and save it
+    as a (lat, lon, month, variable) float32 .npy array.
+    """
+    with open(stations_file, 'r', encoding='utf-8') as f:
+        stations = json.load(f)['stations']
+    st_lat = np.array([s['lat'] for s in stations])
+    st_lon = np.array([s['lon'] for s in stations])
+    values = np.array([[s[v] for v in VARIABLES] for s in stations], dtype=np.float64)  # (station, var, month)
+    lat = GRID_LAT0 + GRID_STEP * np.arange(GRID_SHAPE[0])
+    lon = GRID_LON0 + GRID_STEP * np.arange(GRID_SHAPE[1])
+    glat, glon = np.meshgrid(lat, lon, indexing='ij')
+    dist = np.hypot(glat[..., None] - st_lat, (glon[..., None] - st_lon) * np.cos(np.radians(glat[..., None])))
+    weights = 1.0 / np.maximum(dist, 1e-6) ** power
+    weights /= weights.sum(axis=-1, keepdims=True)
+    grid = np.einsum('yxs,svm->yxmv', weights, values).astype(np.float32)
+    np.save(output_file, grid)
+    return grid
+
+
+class ClimateNormals:
+    def __init__(self, path=NORMALS_FILE):
+        self.grid = np.load(path, mmap_mode='r')
+
+    def _cells(self, lat, lon):
+        """Lower-left cell indices and bilinear weights; points outside the grid are clamped to its edge."""
+        nlat, nlon = self.grid.shape[:2]
+        fy = np.clip((np.asarray(lat, dtype=np.float64) - GRID_LAT0) / GRID_STEP, 0, nlat - 1)
+        fx = np.clip((np.asarray(lon, dtype=np.float64) - GRID_LON0) / GRID_STEP, 0, nlon - 1)
+        y0 = np.minimum(fy.astype(np.intp), nlat - 2)
+        x0 = np.minimum(fx.astype(np.intp), nlon - 2)
+        return y0, x0, fy - y0, fx - x0
+
+    def _monthly(self, lat, lon, month_index):
+        y0, x0, wy, wx = self._cells(lat, lon)
+        y0, x0, wy, wx, m = np.broadcast_arrays(y0, x0, wy, wx, month_index)
+        wy = wy[..., None]
+        wx = wx[..., None]
+        g = self.grid
+        return ((g[y0, x0, m] * (1 - wx) + g[y0, x0 + 1, m] * wx) * (1 - wy)
+                + (g[y0 + 1, x0, m] * (1 - wx) + g[y0 + 1, x0 + 1, m] * wx) * wy)
+
+    def monthly(self, lat, lon, month):
+        """
+        Bilinearly interpolated normals for month (1-12). lat, lon and month broadcast
+        against each other; returns a dict of arrays (rainfall is the monthly total, mm).
+        """
+        values = self._monthly(lat, lon, np.asarray(month) - 1)
+        return {name: values[..., i] for i, name in enumerate(VARIABLES)}
+
+    def daily(self, lat, lon, day_of_year):
+        """
+        Normals for a day of year (1-366), interpolated in time between mid-month values.
+        Rainfall is returned as mm/day.
+        """
+        doy = np.asarray(day_of_year, dtype=np.float64)
+        pos = (doy - MID_MONTH_DOY[0]) / MEAN_MONTH_DAYS
+        m0 = np.floor(pos).astype(np.intp)
+        w = (pos - m0)[..., None]
+        values = self._monthly(lat, lon, m0 % 12) * (1 - w) + self._monthly(lat, lon, (m0 + 1) % 12) * w
+        result = {name: values[..., i] for i, name in enumerate(VARIABLES)}
+        result['rainfall'] = result['rainfall'] / MEAN_MONTH_DAYS
+        return result
+
+
+_shared_normals = None
+_shared_lock = threading.Lock()
+
+
+def get_climate_normals():
+    """Process-wide memory-mapped normals grid."""
+    global _shared_normals
+    with _shared_lock:
+        if _shared_normals is None:
+            _shared_normals = ClimateNormals()
+        return _shared_normals
+
+
+if __name__ == "__main__":
+    import sys
+    if '--build' in sys.argv:
+        build_grid()
+        print(f"Wrote {NORMALS_FILE}")
+    normals = get_climate_normals()
+    print("Pune, July:", {k: round(float(v), 1) for k, v in normals.monthly(18.52, 73.86, 7).items()})
+    lats = np.random.uniform(8, 34, 10000)
+    lons = np.random.uniform(70, 95, 10000)
+    print("10000 plots, January mean temperature:", float(normals.monthly(lats, lons, 1)['temperature'].mean()))
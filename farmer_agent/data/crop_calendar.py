@@ -2,35 +2,52 @@
 # Provides crop schedules and allows setting reminders for farming activities
 import json
 import os
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
 
+from farmer_agent.data.reminder_store import REMINDER_FILE, get_reminder_store
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 CALENDAR_FILE = os.path.join(DATA_DIR, 'crop_calendar.json')
-REMINDER_FILE = os.path.join(DATA_DIR, 'reminders.json')
+
+def schedule_template(schedule):
+    """
+    Split a sowing-relative schedule into one-off (activity, offset) pairs and recurring
+    (activity, from, every, until) entries. Absolute (ISO date) entries are ignored.
+    """
+    one_off, recurring = [], []
+    for activity, timing in schedule.items():
+        if isinstance(timing, dict):
+            recurring.append((activity, int(timing.get('from', 0)), int(timing['every']), int(timing['until'])))
+        elif isinstance(timing, (int, float)):
+            one_off.append((activity, int(timing)))
+        elif isinstance(timing, list):
+            one_off.extend((activity, int(t)) for t in timing if isinstance(t, (int, float)))
+    return one_off, recurring
+
+
+def is_relative(schedule):
+    """True if a schedule is given as day offsets from sowing rather than absolute dates."""
+    return any(not isinstance(t, str) and not (isinstance(t, list) and all(isinstance(d, str) for d in t))
+               for t in schedule.values())
+
 
 class CropCalendar:
-    def next_activity(self, crop_name, from_date=None):
+    def next_activity(self, crop_name, from_date=None, sowing_date=None):
         """
-        Return the next scheduled activity for a crop after from_date (or today).
+        Return the next scheduled activity for a crop after from_date (or today). A crop with
+        no dated entries (offset schedule, no plots added) is resolved against sowing_date,
+        or sown on from_date.
         """
-        schedule = self.get_schedule(crop_name)
-        if not schedule:
-            return None
+        dates, entries = self._crop_index(crop_name)
         today = from_date or datetime.now().strftime('%Y-%m-%d')
-        next_act = None
-        next_date = None
-        for activity, timing in schedule.items():
-            if isinstance(timing, str):
-                if timing >= today:
-                    if not next_date or timing < next_date:
-                        next_act, next_date = activity, timing
-            elif isinstance(timing, list):
-                for d in timing:
-                    if d >= today:
-                        if not next_date or d < next_date:
-                            next_act, next_date = activity, d
-        if next_act:
-            return {'activity': next_act, 'date': next_date}
+        if not entries:
+            schedule = self.generate_schedules([(None, crop_name, sowing_date or today)])[0]
+            dates = [e['date'] for e in schedule]
+            entries = [(e['date'], e['crop'], e['activity'], None) for e in schedule]
+        i = bisect_left(dates, today)
+        if i < len(entries):
+            return {'activity': entries[i][2], 'date': entries[i][0]}
         return None
     def get_calendar_options(self):
         """
@@ -46,16 +63,174 @@ class CropCalendar:
         ]
     def __init__(self):
         self.calendar = self.load_calendar()
+        self.plot_schedules = []
+        self.thermal = {}
+        self.compile_index()
+
+    def compile_index(self):
+        """
+        Compile the calendar into a date-sorted index of (date, crop, activity, plot) entries, one
+        overall and one per crop, so date lookups and ranges are binary searches. Absolute-date
+        schedules and the schedules of plots added with add_plots() or add_thermal_plots() are indexed.
+        """
+        entries = []
+        for crop, schedule in self.calendar.items():
+            if is_relative(schedule):
+                continue
+            for activity, timing in schedule.items():
+                for d in ([timing] if isinstance(timing, str) else timing):
+                    entries.append((d, len(entries), crop, activity, None))
+        thermal = [s for calendar in self.thermal_calendars() for s in calendar.schedules()]
+        for schedule in self.plot_schedules + thermal:
+            for e in schedule:
+                entries.append((e['date'], len(entries), e['crop'], e['activity'], e.get('plot')))
+        entries.sort()
+        self.index = [(d, crop, activity, plot) for d, _, crop, activity, plot in entries]
+        self._index_dates = [e[0] for e in self.index]
+        self._crop_entries = {}
+        for entry in self.index:
+            self._crop_entries.setdefault(entry[1].lower(), []).append(entry)
+        self._crop_dates = {crop: [e[0] for e in found] for crop, found in self._crop_entries.items()}
+
+    def _crop_index(self, crop_name):
+        key = crop_name.lower()
+        return self._crop_dates.get(key, []), self._crop_entries.get(key, [])
+
+    def activities_between(self, start, end, crops=None):
+        """
+        All activities with start <= date < end (ISO dates) across crops, ordered by date,
+        as {'date', 'crop', 'activity'} dicts ('plot' added for plot schedules). crops optionally
+        limits the result to some crops.
+        """
+        lo = bisect_left(self._index_dates, start)
+        hi = bisect_left(self._index_dates, end)
+        wanted = {c.lower() for c in crops} if crops else None
+        found = []
+        for d, crop, activity, plot in self.index[lo:hi]:
+            if wanted is None or crop.lower() in wanted:
+                found.append({'date': d, 'crop': crop, 'activity': activity})
+                if plot is not None:
+                    found[-1]['plot'] = plot
+        return found
+
+    def generate_schedules(self, rows):
+        """
+        Concrete schedules for many plots at once. rows: iterable of (plot, crop, sowing_date)
+        with ISO or date sowing dates. Plots of the same crop are computed in one vectorized
+        pass (sowing dates x stage offsets). Returns one date-sorted list per row of
+        {'date', 'crop', 'activity', 'plot'} dicts; crops without a relative schedule get [].
+        """
+        import numpy as np
+        rows = list(rows)
+        schedules = [[] for _ in rows]
+        by_crop = {}
+        for i, (_, crop, _) in enumerate(rows):
+            by_crop.setdefault(crop.lower(), []).append(i)
+        for crop_key, members in by_crop.items():
+            template = self.get_schedule(crop_key)
+            if not template or not is_relative(template):
+                continue
+            crop = next(k for k in self.calendar if k.lower() == crop_key)
+            one_off, recurring = schedule_template(template)
+            activities = [a for a, _ in one_off]
+            offsets = [o for _, o in one_off]
+            for activity, first, every, until in recurring:
+                days = range(first, until + 1, every)
+                activities.extend([activity] * len(days))
+                offsets.extend(days)
+            offsets = np.asarray(offsets, dtype='timedelta64[D]')
+            order = np.argsort(offsets, kind='stable')
+            sowing = np.array([str(rows[i][2]) for i in members], dtype='datetime64[D]')
+            dates = (sowing[:, None] + offsets[None, order]).astype(str)
+            ordered = [activities[j] for j in order]
+            for i, plot_dates in zip(members, dates):
+                plot = rows[i][0]
+                schedules[i] = [{'date': d, 'crop': crop, 'activity': a, 'plot': plot}
+                                for d, a in zip(plot_dates.tolist(), ordered)]
+        return schedules
+
+    def add_plots(self, rows):
+        """Add plots (plot, crop, sowing_date) so their schedules appear in the date index; returns the schedules."""
+        schedules = self.generate_schedules(rows)
+        self.plot_schedules.extend(s for s in schedules if s)
+        self.compile_index()
+        return schedules
+
+    def add_thermal_plots(self, rows, lat, lon, forecast=None):
+        """
+        Add plots (plot, crop, sowing_date) whose stages are predicted from growing degree days
+        (the crop's 'gdd_stages' in crops.json) instead of fixed offsets. Plots of a crop are kept
+        together in one ThermalCalendar; forecast (ForecastSeries.daily()) sharpens the first days.
+        Returns {crop: ThermalCalendar} for the crops added.
+        """
+        from farmer_agent.data.phenology import ThermalCalendar
+        by_crop = {}
+        for plot, crop, sowing in rows:
+            by_crop.setdefault(crop, []).append((plot, str(sowing)))
+        added = {}
+        for crop, plots in by_crop.items():
+            calendar = ThermalCalendar(crop, [p for p, _ in plots], [s for _, s in plots], lat, lon)
+            calendar.predict(forecast)
+            self.thermal.setdefault(crop.lower(), []).append(calendar)
+            added[crop] = calendar
+        self.compile_index()
+        return added
+
+    def update_weather(self, dates, tmin, tmax, forecast=None, reminders=None, from_date=None):
+        """
+        Feed observed daily temperatures to every thermal-time plot, re-predict the remaining
+        stages and, with reminders, add or move stage reminders whose predicted date changed.
+        Returns the number of reminders added or moved.
+        """
+        changed = 0
+        for calendar in self.thermal_calendars():
+            calendar.observe(dates, tmin, tmax)
+            calendar.predict(forecast)
+            if reminders is not None:
+                changed += calendar.sync_reminders(reminders, from_date)
+        self.compile_index()
+        return changed
+
+    def thermal_calendars(self):
+        return [calendar for calendars in self.thermal.values() for calendar in calendars]
+
+    def schedule_reminders(self, rows, reminders=None, from_date=None):
+        """
+        Turn plot schedules into reminders: one-off activities from from_date (default today)
+        are inserted in one batch, and each recurring activity becomes a single reminder rule.
+        Activities are labelled with their plot. Returns the number of reminders and rules added.
+        """
+        reminders = reminders or Reminders()
+        from_date = from_date or datetime.now().strftime('%Y-%m-%d')
+        rows = list(rows)
+        one_offs, added = [], 0
+        for (plot, crop, sowing), schedule in zip(rows, self.generate_schedules(rows)):
+            if not schedule:
+                continue
+            _, recurring = schedule_template(self.get_schedule(crop))
+            repeating = {activity for activity, _, _, _ in recurring}
+            label = (lambda a: f"{a} ({plot})") if plot is not None else (lambda a: a)
+            one_offs.extend((crop, label(e['activity']), e['date'], False) for e in schedule
+                            if e['activity'] not in repeating and e['date'] >= from_date)
+            sown = datetime.strptime(str(sowing), '%Y-%m-%d')
+            for activity, first, every, until in recurring:
+                start = (sown + timedelta(days=first)).strftime('%Y-%m-%d')
+                end = (sown + timedelta(days=until)).strftime('%Y-%m-%d')
+                if end >= from_date:
+                    reminders.store.add_rule(crop, label(activity), start, every, until=end, user=reminders.user)
+                    added += 1
+        return added + reminders.store.add_many(one_offs, user=reminders.user)
 
     def load_calendar(self):
         if not os.path.exists(CALENDAR_FILE):
             return {}
         with open(CALENDAR_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            return {k: v for k, v in json.load(f).items() if not k.startswith('_')}
 
-    def get_schedule(self, crop_name):
+    def get_schedule(self, crop_name, sowing_date=None):
         """
         Returns the full schedule for a crop, including sowing, transplanting, fertilizing, irrigation, and harvesting.
+        Schedules are day offsets from sowing; with sowing_date (ISO) the activities are given as dates instead.
         """
         schedule = self.calendar.get(crop_name.lower(), None)
         if not schedule:
@@ -64,6 +239,11 @@ class CropCalendar:
                 if k.lower() == crop_name.lower():
                     schedule = v
                     break
+        if schedule and sowing_date and is_relative(schedule):
+            dated = {}
+            for e in self.generate_schedules([(None, crop_name, sowing_date)])[0]:
+                dated.setdefault(e['activity'], []).append(e['date'])
+            return {a: d[0] if len(d) == 1 else d for a, d in dated.items()}
         return schedule or {}
 
     def list_crops(self):
@@ -74,42 +254,24 @@ class CropCalendar:
         """
         Suggest activities for a crop on a given date (or today).
         """
-        schedule = self.get_schedule(crop_name)
-        if not schedule:
-            return []
+        dates, entries = self._crop_index(crop_name)
         today = date or datetime.now().strftime('%Y-%m-%d')
-        suggestions = []
-        for activity, timing in schedule.items():
-            if isinstance(timing, str) and timing == today:
-                suggestions.append(activity)
-            elif isinstance(timing, list) and today in timing:
-                suggestions.append(activity)
-        return suggestions
+        return [e[2] for e in entries[bisect_left(dates, today):bisect_right(dates, today)]]
 
 class Reminders:
-    def add_recurring_reminder(self, crop, activity, start_in_days, interval_days, occurrences):
+    def add_recurring_reminder(self, crop, activity, start_in_days, interval_days, occurrences, until=None):
         """
-        Add a recurring reminder for a crop activity, starting after start_in_days, repeating every interval_days, for a number of occurrences.
+        Add a recurring reminder for a crop activity, starting after start_in_days, repeating every interval_days, for a number of occurrences
+        (and/or until an ISO date). It is stored as one rule, whatever the number of occurrences.
         """
-        for i in range(occurrences):
-            date = (datetime.now() + timedelta(days=start_in_days + i * interval_days)).strftime('%Y-%m-%d')
-            self.reminders.append({'crop': crop, 'activity': activity, 'date': date, 'recurring': True})
-        self.save_reminders()
+        start = (datetime.now() + timedelta(days=start_in_days)).strftime('%Y-%m-%d')
+        self.store.add_rule(crop, activity, start, interval_days, count=occurrences, until=until, user=self.user)
 
     def delete_reminder(self, crop, activity=None, date=None):
         """
         Delete reminders by crop, and optionally by activity and date.
         """
-        new_reminders = []
-        for r in self.reminders:
-            if r['crop'].lower() != crop.lower():
-                new_reminders.append(r)
-            elif activity and r['activity'].lower() != activity.lower():
-                new_reminders.append(r)
-            elif date and r['date'] != date:
-                new_reminders.append(r)
-        self.reminders = new_reminders
-        self.save_reminders()
+        self.store.delete(crop, activity, date, user=self.user)
     def get_reminder_options(self):
         """
         Returns the available reminder options for UI button selection (for future extensibility), matching the main UI.
@@ -119,41 +281,47 @@ class Reminders:
             ("Add recurring reminder", "4"),
             ("Delete reminders", "5")
         ]
-    def __init__(self):
-        self.reminders = self.load_reminders()
+    def __init__(self, store=None, user=None):
+        """
+        Reminders are kept in an indexed SQLite store (reminders.json is imported on first use).
+        user scopes reminders to one farmer; None is the shared device list.
+        """
+        self.user = user or ''
+        self.store = store or get_reminder_store()
+
+    @property
+    def reminders(self):
+        """All reminders, ordered by date (a fresh list: assign to the attribute to replace them)."""
+        return self.load_reminders()
+
+    @reminders.setter
+    def reminders(self, records):
+        """Replace this user's reminders with a list of {'crop', 'activity', 'date', 'recurring'} dicts."""
+        records = list(records)
+        for crop in {r['crop'] for r in self.load_reminders()}:
+            self.store.delete(crop, user=self.user)
+        self.store.add_many([(r['crop'], r['activity'], r['date'], r.get('recurring', False)) for r in records], user=self.user)
 
     def load_reminders(self):
-        if not os.path.exists(REMINDER_FILE):
-            return []
-        with open(REMINDER_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.store.query(user=self.user)
 
     def add_reminder(self, crop, activity, days_from_now):
         date = (datetime.now() + timedelta(days=days_from_now)).strftime('%Y-%m-%d')
-        self.reminders.append({'crop': crop, 'activity': activity, 'date': date})
-        self.save_reminders()
+        self.store.add(crop, activity, date, user=self.user)
 
     def search_reminders(self, crop=None, activity=None, upcoming_only=True):
         """
         Search reminders by crop, activity, and optionally only upcoming.
         """
         today = datetime.now().strftime('%Y-%m-%d')
-        results = self.reminders
-        if crop:
-            results = [r for r in results if r['crop'].lower() == crop.lower()]
-        if activity:
-            results = [r for r in results if activity.lower() in r['activity'].lower()]
-        if upcoming_only:
-            results = [r for r in results if r['date'] >= today]
-        return results
+        return self.store.query(start=today if upcoming_only else None, crop=crop, activity=activity, user=self.user)
 
     def save_reminders(self):
-        with open(REMINDER_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.reminders, f, ensure_ascii=False, indent=2)
+        """Kept for compatibility: the store commits every change as it is made."""
 
     def get_upcoming(self):
         today = datetime.now().strftime('%Y-%m-%d')
-        return [r for r in self.reminders if r['date'] >= today]
+        return self.store.query(start=today, user=self.user)
 
 if __name__ == "__main__":
     # Demo: List all crops and their schedules
@@ -181,6 +349,13 @@ if __name__ == "__main__":
     print("Reminders after deletion:")
     print(reminders.get_upcoming())
 
+    # Plot schedules demo: two tomato plots sown a week apart
+    sown = datetime.now().strftime('%Y-%m-%d')
+    week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+    calendar.add_plots([('Plot A', 'Tomato', sown), ('Plot B', 'Tomato', week_ago)])
+
     # Next activity demo
     print("\nNext scheduled activity for Tomato:")
     print(calendar.next_activity('Tomato'))
+    print("\nDue in the next 7 days:")
+    print(calendar.activities_between(sown, (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')))
@@ -1,14 +1,67 @@
 # Offline FAQ & Guidance
 # Provides frequently asked questions and best practices for common crops/issues
+import bisect
+import difflib
+import hashlib
 import json
 import os
+from farmer_agent.data.answer_cache import get_answer_cache
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 FAQ_FILE = os.path.join(DATA_DIR, 'faq.json')
+FAQ_INDEX_FILE = os.path.join(DATA_DIR, 'faq_index.json')
+FAQ_INDEX_VERSION = 1
+
+# Languages the LLM FAQ path can answer in (matches the UI language selector)
+LANGUAGE_NAMES = {'en': 'English', 'hi': 'Hindi', 'ta': 'Tamil'}
+# Unicode blocks that identify a query's language without asking the LLM
+LANGUAGE_SCRIPTS = {'hi': ('\u0900', '\u097f'), 'ta': ('\u0b80', '\u0bff')}
+
+# Number of neighbors kept per question and minimum similarity for a related question
+RELATED_K = 5
+RELATED_CUTOFF = 0.4
+
+
+def question_similarity(a, b):
+    """Similarity ratio (0-1) between two questions, case-insensitive."""
+    # SequenceMatcher is not symmetric; order the pair so both directions agree
+    a, b = sorted((a.lower(), b.lower()))
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def query_language(text, default='en'):
+    """Language code of a query from its script (Devanagari -> 'hi', Tamil -> 'ta'), else default."""
+    for lang, (lo, hi) in LANGUAGE_SCRIPTS.items():
+        if any(lo <= ch <= hi for ch in text):
+            return lang
+    return default
+
+
+def entry_hash(item):
+    """Content hash of one FAQ entry, used to detect added or changed entries."""
+    raw = json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
 
 class FAQ:
-    def __init__(self):
-        self.faq = self.load_faq()
+    def __init__(self, k=RELATED_K):
+        self.k = k
+        self.faq = []
+        self._hashes = []
+        self._fields = {}
+        self._by_question = {}
+        self.neighbors = {}
+        self._signature = None
+        self.load_index()
+        self.refresh(force=True)
 
     def load_faq(self):
         if not os.path.exists(FAQ_FILE):
@@ -16,7 +69,183 @@ class FAQ:
         with open(FAQ_FILE, 'r', encoding='utf-8') as f:
             return json.load(f)
 
-    def search(self, query, tags=None, fuzzy=False, use_llm=True, model="phi3:mini", host="http://localhost:11434"):
+    def save_faq(self):
+        tmp_file = FAQ_FILE + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.faq, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, FAQ_FILE)
+        self._signature = _file_signature(FAQ_FILE)
+
+    def load_index(self):
+        """
+        Load the persisted neighbor graph saved next to faq.json.
+        Only questions are restored here; entries are attached by refresh().
+        """
+        try:
+            with open(FAQ_INDEX_FILE, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get('version') != FAQ_INDEX_VERSION or index.get('k') != self.k:
+            return
+        self.neighbors = {q: [(-score, other) for other, score in links]
+                          for q, links in index.get('neighbors', {}).items()}
+        self._by_question = dict.fromkeys(self.neighbors)
+        self._hashes = index.get('hashes', [])
+
+    def save_index(self):
+        index = {
+            'version': FAQ_INDEX_VERSION,
+            'k': self.k,
+            'hashes': self._hashes,
+            'neighbors': {q: [[other, -neg_score] for neg_score, other in links]
+                          for q, links in self.neighbors.items()}
+        }
+        tmp_file = FAQ_INDEX_FILE + ".tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(tmp_file, FAQ_INDEX_FILE)
+        except OSError as e:
+            print(f"FAQ index save error: {e}")
+
+    def refresh(self, force=False):
+        """
+        Pick up entries added or changed in faq.json since the last load (force: check even if
+        the file looks unchanged). Only entries whose content hash changed are re-indexed, and a
+        saved index that no longer matches faq.json (or outlived it) is brought in line with it;
+        returns True if anything changed.
+        """
+        signature = _file_signature(FAQ_FILE)
+        if signature == self._signature and not force:
+            return False
+        self._signature = signature
+        try:
+            entries = self.load_faq()
+        except ValueError as e:
+            # File is mid-write or malformed; keep serving the current index
+            print(f"FAQ load error: {e}")
+            self._signature = None
+            return False
+        hashes = [entry_hash(item) for item in entries]
+        changed = hashes != self._hashes
+        self._sync(entries, hashes)
+        if changed:
+            self.save_index()
+        return changed
+
+    def _sync(self, entries, hashes):
+        """Update search fields and the neighbor graph in place to match entries."""
+        fields = {}
+        for item, h in zip(entries, hashes):
+            fields[h] = self._fields.get(h) or self._search_fields(item)
+        self._fields = fields
+        questions = {item.get('question') for item in entries if item.get('question')}
+        for question in [q for q in self._by_question if q not in questions]:
+            self._remove_node(question)
+        for item in entries:
+            question = item.get('question')
+            if question in self._by_question:
+                self._by_question[question] = item
+            else:
+                self._add_node(item)
+        self.faq = entries
+        self._hashes = hashes
+
+    def build_related_graph(self):
+        """
+        Rebuild the k-nearest-neighbor graph over all FAQ questions from scratch.
+        self.neighbors maps each question to a list of (-score, question) sorted best first.
+        """
+        self._by_question = {}
+        self.neighbors = {}
+        for item in self.faq:
+            self._add_node(item)
+
+    @staticmethod
+    def _search_fields(item):
+        """Lower-cased question, answer and tags precomputed for static search."""
+        return (
+            item.get('question', '').lower(),
+            item.get('answer', '').lower(),
+            {t.lower() for t in item.get('tags', [])}
+        )
+
+    def _add_node(self, item):
+        """Link a new item into the graph, comparing it once against every existing question."""
+        question = item.get('question')
+        if not question or question in self._by_question:
+            return
+        links = []
+        for other in self._by_question:
+            score = question_similarity(question, other)
+            self._link(other, question, score)
+            links.append((-score, other))
+        links.sort()
+        self._by_question[question] = item
+        self.neighbors[question] = links[:self.k]
+
+    def _remove_node(self, question):
+        """Drop a question from the graph and recompute neighbor lists that pointed to it."""
+        del self._by_question[question]
+        del self.neighbors[question]
+        for other, links in self.neighbors.items():
+            if any(q == question for _, q in links):
+                links[:] = sorted((-question_similarity(other, q), q) for q in self._by_question if q != other)[:self.k]
+
+    def _link(self, question, other, score):
+        """Insert other into question's neighbor list if it ranks in the top k."""
+        nbrs = self.neighbors[question]
+        entry = (-score, other)
+        if len(nbrs) >= self.k and entry >= nbrs[-1]:
+            return
+        bisect.insort(nbrs, entry)
+        del nbrs[self.k:]
+
+    def add_entry(self, question, answer, tags=None, save=True):
+        """
+        Add a new FAQ entry and update the search structures incrementally.
+        """
+        self.refresh()
+        item = {'question': question, 'answer': answer, 'tags': tags or []}
+        h = entry_hash(item)
+        self.faq.append(item)
+        self._hashes.append(h)
+        self._fields[h] = self._search_fields(item)
+        self._add_node(item)
+        if save:
+            self.save_faq()
+            self.save_index()
+        return item
+
+    def ask_llm(self, query, lang='en', model="phi3:mini", host="http://localhost:11434", use_cache=True):
+        """
+        Answer a question with the local LLM (Ollama), serving repeats from the answer cache.
+        Raises on LLM/network errors so callers can fall back.
+        """
+        cache = get_answer_cache() if use_cache else None
+        if cache:
+            cached = cache.get(query, lang, model)
+            if cached is not None:
+                return cached
+        import requests
+        prompt = query
+        if lang != 'en':
+            prompt += f"\nAnswer in {LANGUAGE_NAMES.get(lang, lang)}."
+        url = f"{host}/api/generate"
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False
+        }
+        response = requests.post(url, json=payload, timeout=30)
+        response.raise_for_status()
+        llm_response = response.json().get("response", "")
+        if cache and llm_response:
+            cache.put(query, llm_response, lang, model)
+        return llm_response
+
+    def search(self, query, tags=None, fuzzy=False, use_llm=True, model="phi3:mini", host="http://localhost:11434", lang='en'):
         """
         Search FAQ using local LLM (Ollama) if available, otherwise fallback to static FAQ search.
         :param query: search string
@@ -25,31 +254,21 @@ class FAQ:
         :param use_llm: if True, use Ollama LLM for response
         :param model: Ollama model name
         :param host: Ollama server host
+        :param lang: language code for the LLM answer
         """
         if use_llm:
             try:
-                import requests
-                url = f"{host}/api/generate"
-                payload = {
-                    "model": model,
-                    "prompt": query,
-                    "stream": False
-                }
-                response = requests.post(url, json=payload, timeout=30)
-                response.raise_for_status()
-                llm_response = response.json().get("response", "")
+                llm_response = self.ask_llm(query, lang=lang, model=model, host=host)
                 return [{"question": query, "answer": llm_response, "tags": ["llm"]}]
             except Exception as e:
                 # Fallback to static search if LLM fails
                 pass
         # --- Static search fallback ---
-        import difflib
+        self.refresh()
         query_l = query.lower()
         results = []
-        for item in self.faq:
-            q = item.get('question', '').lower()
-            a = item.get('answer', '').lower()
-            item_tags = [t.lower() for t in item.get('tags', [])] if 'tags' in item else []
+        for item, h in zip(self.faq, self._hashes):
+            q, a, item_tags = self._fields[h]
             match = False
             if fuzzy:
                 if difflib.get_close_matches(query_l, [q, a], n=1, cutoff=0.6):
@@ -67,12 +286,26 @@ class FAQ:
 
     def related_questions(self, query, top_n=3):
         """
-        Return top N related questions using fuzzy matching.
+        Return top N related questions from the precomputed neighbor graph.
+        A query that is not an FAQ question is first matched to its closest question,
+        which is returned ahead of that question's neighbors.
         """
-        import difflib
-        questions = [item['question'] for item in self.faq]
-        matches = difflib.get_close_matches(query, questions, n=top_n, cutoff=0.4)
-        return [item for item in self.faq if item['question'] in matches]
+        self.refresh()
+        results = []
+        if query not in self.neighbors:
+            matches = difflib.get_close_matches(query, list(self.neighbors), n=1, cutoff=RELATED_CUTOFF)
+            if not matches:
+                return []
+            query = matches[0]
+            if self._by_question.get(query) is not None:
+                results.append(self._by_question[query])
+        for neg_score, other in self.neighbors[query]:
+            if len(results) >= top_n or -neg_score < RELATED_CUTOFF:
+                break
+            # Questions restored from the index but not (yet) found in faq.json are skipped
+            if self._by_question.get(other) is not None:
+                results.append(self._by_question[other])
+        return results
 
     def get_all(self):
         return self.faq
@@ -81,3 +314,4 @@ if __name__ == "__main__":
     faq = FAQ()
     print(faq.get_all())
     print(faq.search('tomato'))
+    print(faq.related_questions('How often should I water tomato plants?'))
@@ -0,0 +1,143 @@
+# Offline FAQ Answer Cache Warmer
+# Batch job that pre-answers every FAQ question (and common paraphrases) through the LLM FAQ path
+# during idle hours, so the first farmer to ask a common question is served from the cache
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from farmer_agent.data.answer_cache import get_answer_cache
+from farmer_agent.data.faq import FAQ, LANGUAGE_NAMES
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+WARMER_STATE_FILE = os.path.join(DATA_DIR, 'faq_warmer_state.json')
+
+# Local hours during which the warmer runs unless forced (22:00-05:59)
+IDLE_HOURS = set(range(22, 24)) | set(range(0, 6))
+# Warmed answers are written to the cache file in batches of this many (and at the end)
+SAVE_EVERY = 10
+
+# Question rewrites farmers commonly use for the same intent
+PARAPHRASE_RULES = [
+    (r'^how can i ', 'how do i '),
+    (r'^how do i ', 'how can i '),
+    (r'^how often should i ', 'how frequently should i '),
+    (r'^what is the best ', 'which is the best '),
+    (r'^what are the best ', 'which are the best '),
+    (r'^when should i ', 'what is the right time to '),
+    (r'^how to ', 'how do i '),
+]
+
+
+def paraphrases(question):
+    """Return the question plus rule-based rewordings (case and punctuation are normalized by the cache)."""
+    variants = [question]
+    lowered = question.lower()
+    for pattern, replacement in PARAPHRASE_RULES:
+        if re.match(pattern, lowered):
+            variants.append(re.sub(pattern, replacement, lowered))
+    return variants
+
+
+class FAQWarmer:
+    def __init__(self, faq=None, languages=None, model="phi3:mini", host="http://localhost:11434"):
+        self.faq = faq or FAQ()
+        self.cache = get_answer_cache()
+        self.languages = languages or list(LANGUAGE_NAMES)
+        self.model = model
+        self.host = host
+        self.state = self.load_state()
+
+    def load_state(self):
+        if not os.path.exists(WARMER_STATE_FILE):
+            return {'failed': {}, 'runs': []}
+        try:
+            with open(WARMER_STATE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'failed': {}, 'runs': []}
+
+    def save_state(self):
+        tmp_file = WARMER_STATE_FILE + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, WARMER_STATE_FILE)
+
+    def plan(self):
+        """All (language, question) jobs in a stable order: FAQ questions first, then paraphrases."""
+        questions = [item['question'] for item in self.faq.get_all() if item.get('question')]
+        originals = [(lang, q) for lang in self.languages for q in questions]
+        variants = [(lang, p) for lang in self.languages for q in questions for p in paraphrases(q)[1:]]
+        return originals + variants
+
+    def pending(self):
+        """Jobs not yet in the cache; a stopped run resumes from here."""
+        return [(lang, q) for lang, q in self.plan() if not self.cache.contains(q, lang, self.model)]
+
+    def run(self, time_budget=1800, force=False):
+        """
+        Answer pending questions until done or time_budget (seconds) runs out.
+        Outside IDLE_HOURS nothing is done unless force is True.
+        """
+        if not force and datetime.now().hour not in IDLE_HOURS:
+            return {'skipped': 'outside idle hours', **self.coverage()}
+        if hasattr(os, 'nice'):
+            try:
+                os.nice(10)
+            except OSError:
+                pass
+        deadline = time.monotonic() + time_budget
+        warmed = failed = 0
+        for lang, question in self.pending():
+            if time.monotonic() >= deadline:
+                break
+            try:
+                answer = self.faq.ask_llm(question, lang=lang, model=self.model, host=self.host, use_cache=False)
+            except Exception as e:
+                self.state['failed'][f"{lang}|{question}"] = str(e)
+                failed += 1
+                continue
+            if answer:
+                self.cache.put(question, answer, lang, self.model, source='warmer', save=False)
+                self.state['failed'].pop(f"{lang}|{question}", None)
+                warmed += 1
+                if warmed % SAVE_EVERY == 0:
+                    self.cache.save_cache()
+        self.cache.save_cache()
+        report = {'warmed': warmed, 'failed': failed, **self.coverage()}
+        self.state['runs'] = (self.state.get('runs', []) + [{
+            'finished_at': datetime.now().isoformat(),
+            'warmed': warmed,
+            'failed': failed,
+            'remaining': report['remaining']
+        }])[-20:]
+        self.save_state()
+        return report
+
+    def coverage(self):
+        """Share of planned questions cached per language, plus the live cache hit rate."""
+        jobs = self.plan()
+        by_lang = {}
+        for lang, question in jobs:
+            done, total = by_lang.get(lang, (0, 0))
+            by_lang[lang] = (done + self.cache.contains(question, lang, self.model), total + 1)
+        remaining = sum(total - done for done, total in by_lang.values())
+        return {
+            'coverage': {lang: (done / total if total else None) for lang, (done, total) in by_lang.items()},
+            'remaining': remaining,
+            'live_hit_rate': self.cache.hit_rate()
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm the LLM FAQ answer cache.")
+    parser.add_argument('--budget', type=int, default=1800, help="time budget in seconds")
+    parser.add_argument('--lang', action='append', help="language code (repeatable, default: all)")
+    parser.add_argument('--force', action='store_true', help="run outside idle hours")
+    parser.add_argument('--report', action='store_true', help="only print coverage")
+    args = parser.parse_args()
+    warmer = FAQWarmer(languages=args.lang)
+    result = warmer.coverage() if args.report else warmer.run(time_budget=args.budget, force=args.force)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
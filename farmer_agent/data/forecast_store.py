@@ -0,0 +1,245 @@
+# Forecast Time-Series Store
+# Multi-day forecasts kept per location as columnar NumPy arrays (one timestamp column plus one
+# column per variable), persisted as one .npz file per location. Refreshes merge only the rows
+# that are new or whose values changed, and readers take forecast windows by array slicing.
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+FORECAST_DIR = os.path.join(DATA_DIR, 'forecasts')
+
+VARIABLES = ('temperature', 'temp_min', 'temp_max', 'humidity', 'rainfall', 'wind_speed', 'pop')
+SLOT_SECONDS = 3 * 3600               # OpenWeatherMap 5-day forecast step
+FORECAST_TTL = 3 * 3600               # refresh the near-term horizon this often
+FULL_REFRESH_INTERVAL = 12 * 3600     # fetch the whole horizon (to extend its tail) this often
+NEAR_SLOTS = 8                        # slots fetched by a near-term refresh (24 h)
+RETENTION = 2 * 86400                 # keep this much past forecast for today's windows
+META_FIELDS = ('last_refresh', 'last_full', 'timezone')
+
+
+class ForecastSeries:
+    """
+    One location's forecast: `times` (int64 epoch seconds, sorted, unique), one float32 array per
+    variable in `values`, and `updated` (when each row was last written). Missing values are NaN.
+    """
+
+    def __init__(self, times=None, values=None, updated=None, meta=None):
+        self.times = np.asarray(times if times is not None else [], dtype=np.int64)
+        n = len(self.times)
+        values = values or {}
+        self.values = {name: np.asarray(values.get(name, np.full(n, np.nan)), dtype=np.float32) for name in VARIABLES}
+        self.updated = np.asarray(updated if updated is not None else np.zeros(n), dtype=np.int64)
+        self.meta = dict.fromkeys(META_FIELDS, 0)
+        self.meta.update(meta or {})
+
+    def __len__(self):
+        return len(self.times)
+
+    @classmethod
+    def from_openweather(cls, data):
+        """Build a series from an OpenWeatherMap /forecast response."""
+        rows = data.get('list', [])
+        times = np.array([r['dt'] for r in rows], dtype=np.int64)
+
+        def column(get):
+            return np.array([get(r) for r in rows], dtype=np.float32)
+
+        values = {
+            'temperature': column(lambda r: r.get('main', {}).get('temp', np.nan)),
+            'temp_min': column(lambda r: r.get('main', {}).get('temp_min', np.nan)),
+            'temp_max': column(lambda r: r.get('main', {}).get('temp_max', np.nan)),
+            'humidity': column(lambda r: r.get('main', {}).get('humidity', np.nan)),
+            'rainfall': column(lambda r: r.get('rain', {}).get('3h', 0.0)),
+            'wind_speed': column(lambda r: r.get('wind', {}).get('speed', np.nan)),
+            'pop': column(lambda r: r.get('pop', np.nan)),
+        }
+        order = np.argsort(times, kind='stable')
+        return cls(times[order], {k: v[order] for k, v in values.items()},
+                   meta={'timezone': data.get('city', {}).get('timezone', 0)})
+
+    def merge(self, other, now=None):
+        """
+        Merge another series into this one in place: rows with new timestamps are inserted,
+        existing rows are overwritten only where a value changed. Returns (added, changed).
+        """
+        now = int(now if now is not None else time.time())
+        if not len(other):
+            return 0, 0
+        pos = np.searchsorted(self.times, other.times)
+        exists = np.zeros(len(other), dtype=bool)
+        if len(self):
+            exists = self.times[np.minimum(pos, len(self) - 1)] == other.times
+        idx = pos[exists]
+        changed = np.zeros(len(idx), dtype=bool)
+        for name in VARIABLES:
+            old = self.values[name][idx]
+            new = other.values[name][exists]
+            changed |= ~((old == new) | (np.isnan(old) & np.isnan(new)))
+        for name in VARIABLES:
+            self.values[name][idx[changed]] = other.values[name][exists][changed]
+        self.updated[idx[changed]] = now
+        added = int((~exists).sum())
+        if added:
+            self.times = np.concatenate([self.times, other.times[~exists]])
+            order = np.argsort(self.times, kind='stable')
+            self.times = self.times[order]
+            for name in VARIABLES:
+                self.values[name] = np.concatenate([self.values[name], other.values[name][~exists]])[order]
+            self.updated = np.concatenate([self.updated, np.full(added, now, dtype=np.int64)])[order]
+        return added, int(changed.sum())
+
+    def prune(self, before):
+        """Drop rows older than `before` (epoch seconds)."""
+        start = np.searchsorted(self.times, before)
+        if start:
+            self.times = self.times[start:]
+            self.values = {name: v[start:] for name, v in self.values.items()}
+            self.updated = self.updated[start:]
+
+    def _bounds(self, start=None, end=None):
+        lo = 0 if start is None else np.searchsorted(self.times, start, side='left')
+        hi = len(self) if end is None else np.searchsorted(self.times, end, side='left')
+        return lo, hi
+
+    def window(self, start=None, end=None):
+        """Rows with start <= time < end as a dict of array views ('time' plus each variable)."""
+        lo, hi = self._bounds(start, end)
+        window = {name: v[lo:hi] for name, v in self.values.items()}
+        window['time'] = self.times[lo:hi]
+        return window
+
+    def daily(self, start=None, end=None):
+        """
+        Aggregate rows into local calendar days: 'date' (datetime64[D]), mean 'temperature'
+        and 'humidity', 'temp_min'/'temp_max' extremes, 'rainfall' total (mm), 'wind_speed'
+        mean, 'pop' maximum. Only days with forecast rows appear. Missing (NaN) values are
+        left out of each aggregate, and a variable with no values on a day is NaN for that day.
+        """
+        w = self.window(start, end)
+        if not len(w['time']):
+            return {'date': np.array([], dtype='datetime64[D]'), **{name: np.array([], dtype=np.float32) for name in VARIABLES}}
+        days = ((w['time'] + int(self.meta.get('timezone', 0))) // 86400).astype('datetime64[D]')
+        dates, first = np.unique(days, return_index=True)
+
+        def total(name):
+            """Per-day nansum and count of present values."""
+            values = w[name].astype(np.float64)
+            present = np.add.reduceat((~np.isnan(values)).astype(np.int64), first)
+            sums = np.add.reduceat(np.nan_to_num(values, nan=0.0), first)
+            return np.where(present > 0, sums, np.nan), present
+
+        def mean(name):
+            sums, present = total(name)
+            return sums / np.maximum(present, 1)
+
+        def extreme(ufunc, name):
+            # fmin/fmax skip NaN unless every value of the day is NaN
+            return ufunc.reduceat(w[name].astype(np.float64), first)
+
+        return {
+            'date': dates,
+            'temperature': mean('temperature'),
+            'humidity': mean('humidity'),
+            'temp_min': extreme(np.fmin, 'temp_min'),
+            'temp_max': extreme(np.fmax, 'temp_max'),
+            'rainfall': total('rainfall')[0],
+            'wind_speed': mean('wind_speed'),
+            'pop': extreme(np.fmax, 'pop'),
+        }
+
+    def to_arrays(self):
+        arrays = {'time': self.times, 'updated': self.updated}
+        arrays.update(self.values)
+        arrays.update({f"meta_{k}": np.int64(v) for k, v in self.meta.items()})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        meta = {k: int(arrays[f"meta_{k}"]) for k in META_FIELDS if f"meta_{k}" in arrays}
+        return cls(arrays['time'], {name: arrays[name] for name in VARIABLES if name in arrays}, arrays['updated'], meta)
+
+
+class ForecastStore:
+    """Per-location forecast series, loaded from disk on first use and written back after a refresh."""
+
+    def __init__(self, directory=FORECAST_DIR):
+        self.directory = directory
+        self._series = {}
+        self._lock = threading.RLock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, re.sub(r'[^a-z0-9.,_-]+', '_', key.lower()) + '.npz')
+
+    def get(self, key):
+        """The stored series for a location key (empty if none)."""
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ForecastSeries()
+                path = self._path(key)
+                if os.path.exists(path):
+                    try:
+                        with np.load(path) as arrays:
+                            series = ForecastSeries.from_arrays(arrays)
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"Forecast store load error for {key}: {e}")
+                self._series[key] = series
+            return series
+
+    def save(self, key):
+        with self._lock:
+            arrays = self.get(key).to_arrays()
+        path = self._path(key)
+        tmp_file = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_file, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_file, path)
+        except OSError as e:
+            print(f"Forecast store save error: {e}")
+
+    def refresh(self, key, fetch, ttl=None, now=None):
+        """
+        Bring a location's series up to date and return it. fetch(cnt) returns a ForecastSeries
+        for the next `cnt` slots (None: the whole horizon), or None on failure. Within the TTL
+        nothing is fetched; otherwise only the near-term slots are requested, except every
+        FULL_REFRESH_INTERVAL (or when empty) when the whole horizon is fetched to extend it.
+        On failure the stored series is returned unchanged.
+        """
+        ttl = FORECAST_TTL if ttl is None else ttl
+        now = int(now if now is not None else time.time())
+        with self._lock:
+            series = self.get(key)
+            if len(series) and now - series.meta['last_refresh'] < ttl:
+                return series
+            full = not len(series) or now - series.meta['last_full'] >= FULL_REFRESH_INTERVAL
+        incoming = fetch(None if full else NEAR_SLOTS)
+        if incoming is None:
+            return series
+        with self._lock:
+            series.merge(incoming, now)
+            series.prune(now - RETENTION)
+            series.meta['last_refresh'] = now
+            series.meta['timezone'] = incoming.meta.get('timezone', series.meta['timezone'])
+            if full:
+                series.meta['last_full'] = now
+        self.save(key)
+        return series
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_forecast_store():
+    """Process-wide forecast store shared by every WeatherEstimator."""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = ForecastStore()
+        return _shared_store
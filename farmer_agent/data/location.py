@@ -0,0 +1,233 @@
+# Location Resolution (Offline-first)
+# Offline gazetteer of Indian places with prefix-trie autocomplete, plus a per-user cache of IP-detected locations
+# Cities, towns and districts come from gazetteer.json; villages from villages.csv, which can be
+# replaced by a larger export (e.g. a census village directory) with the same columns.
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+GAZETTEER_FILE = os.path.join(DATA_DIR, 'gazetteer.json')
+VILLAGES_FILE = os.path.join(DATA_DIR, 'villages.csv')
+LOCATION_CACHE_FILE = os.path.join(DATA_DIR, 'location_cache.json')
+
+IPINFO_URL = "https://ipinfo.io/json"
+
+# IP-detected locations are reused for this long (seconds) before asking ipinfo.io again
+LOCATION_CACHE_TTL = 7 * 24 * 3600
+DEVICE_KEY = '__device__'
+
+# Preferred match when several places share a name
+TYPE_RANK = {'district': 0, 'city': 1, 'town': 2, 'village': 3}
+
+
+def normalize_place(name):
+    return ' '.join(str(name).lower().replace('.', ' ').split())
+
+
+class PrefixTrie:
+    """Character trie mapping normalized keys to lists of values."""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key, value):
+        node = self.root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node.setdefault(None, []).append(value)
+
+    def _node(self, prefix):
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def get(self, key):
+        node = self._node(key)
+        return list(node.get(None, [])) if node else []
+
+    def complete(self, prefix, limit=10):
+        """Values under prefix, shortest keys first (breadth-first), at most limit."""
+        node = self._node(prefix)
+        if node is None:
+            return []
+        results = []
+        queue = deque([node])
+        while queue and len(results) < limit:
+            node = queue.popleft()
+            results.extend(node.get(None, []))
+            queue.extend(node[ch] for ch in sorted(k for k in node if k is not None))
+        return results[:limit]
+
+
+class Gazetteer:
+    def __init__(self, path=GAZETTEER_FILE, villages_path=VILLAGES_FILE):
+        self.places = self.load_places(path) + self.load_villages(villages_path)
+        self.trie = PrefixTrie()
+        for place in self.places:
+            for name in [place['name']] + place.get('aliases', []):
+                self.trie.insert(normalize_place(name), place)
+
+    @staticmethod
+    def load_places(path):
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def load_villages(path):
+        """Village records from a CSV with name, district, state, lat, lon and optional ';'-separated aliases."""
+        if not path or not os.path.exists(path):
+            return []
+        places = []
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                try:
+                    lat, lon = float(row['lat']), float(row['lon'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if not row.get('name'):
+                    continue
+                places.append({'name': row['name'].strip(), 'type': 'village', 'district': row.get('district', '').strip(),
+                               'state': row.get('state', '').strip(), 'lat': lat, 'lon': lon,
+                               'aliases': [a.strip() for a in (row.get('aliases') or '').split(';') if a.strip()]})
+        return places
+
+    def resolve(self, name):
+        """
+        Resolve a typed place name ("Pune" or "Aurangabad, Maharashtra") to a gazetteer record.
+        Returns None when the place is unknown.
+        """
+        if not name:
+            return None
+        parts = [p.strip() for p in str(name).split(',')]
+        matches = self.trie.get(normalize_place(parts[0]))
+        if len(parts) > 1 and parts[1]:
+            region = normalize_place(parts[1])
+            matches = [p for p in matches if region in (normalize_place(p['state']), normalize_place(p['district']))] or matches
+        if not matches:
+            return None
+        return min(matches, key=lambda p: TYPE_RANK.get(p.get('type'), len(TYPE_RANK)))
+
+    def autocomplete(self, prefix, limit=10):
+        """Suggest places whose name or alias starts with prefix."""
+        seen = set()
+        results = []
+        for place in self.trie.complete(normalize_place(prefix), limit * 2):
+            if id(place) not in seen:
+                seen.add(id(place))
+                results.append(place)
+        return results[:limit]
+
+
+class LocationResolver:
+    def __init__(self, gazetteer=None, cache_path=LOCATION_CACHE_FILE, ttl=LOCATION_CACHE_TTL):
+        self.gazetteer = gazetteer or Gazetteer()
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.detected = self.load_cache()
+
+    def load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self):
+        with self._lock:
+            data = dict(self.detected)
+        tmp_file = self.cache_path + ".tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.cache_path)
+        except OSError as e:
+            print(f"Location cache save error: {e}")
+
+    def resolve(self, name):
+        return self.gazetteer.resolve(name)
+
+    def autocomplete(self, prefix, limit=10):
+        return self.gazetteer.autocomplete(prefix, limit)
+
+    def set_location(self, name, user=None):
+        """Pin a typed place as the location for a user (or this device); returns the record or None."""
+        place = self.resolve(name)
+        if place:
+            with self._lock:
+                self.detected[user or DEVICE_KEY] = {'place': {**place, 'source': 'gazetteer'}, 'detected_at': time.time(), 'pinned': True}
+            self.save_cache()
+        return place
+
+    def detect(self, user=None, ipinfo_url=None):
+        """
+        Return the location record for a user (or this device), using ipinfo.io only when
+        the cached detection is missing or older than the TTL. Pinned locations never expire.
+        """
+        key = user or DEVICE_KEY
+        cached = self.detected.get(key)
+        if cached and (cached.get('pinned') or time.time() - cached['detected_at'] < self.ttl):
+            return cached['place']
+        place = self._detect_ip(ipinfo_url or os.environ.get('IPINFO_URL') or IPINFO_URL)
+        if not place:
+            # Offline: a stale detection is better than none
+            return cached['place'] if cached else None
+        with self._lock:
+            self.detected[key] = {'place': place, 'detected_at': time.time()}
+        self.save_cache()
+        return place
+
+    def _detect_ip(self, ipinfo_url):
+        try:
+            resp = requests.get(ipinfo_url, timeout=5)
+            resp.raise_for_status()
+            info = resp.json()
+        except Exception as e:
+            print(f"IP geolocation error: {e}")
+            return None
+        city = info.get('city')
+        if not city:
+            return None
+        place = {'name': city, 'state': info.get('region', ''), 'source': 'ip'}
+        try:
+            lat, lon = (float(v) for v in info.get('loc', '').split(','))
+            place.update(lat=lat, lon=lon)
+        except ValueError:
+            known = self.resolve(f"{city}, {place['state']}")
+            if known:
+                place.update(lat=known['lat'], lon=known['lon'])
+        return place
+
+
+_shared_resolver = None
+_shared_lock = threading.Lock()
+
+
+def get_location_resolver():
+    """Process-wide resolver so the gazetteer trie is built once."""
+    global _shared_resolver
+    with _shared_lock:
+        if _shared_resolver is None:
+            _shared_resolver = LocationResolver()
+        return _shared_resolver
+
+
+if __name__ == "__main__":
+    resolver = get_location_resolver()
+    print("Autocomplete 'ma':", [p['name'] for p in resolver.autocomplete('ma')])
+    print("Resolve 'Bangalore':", resolver.resolve('Bangalore'))
+    print("Resolve village 'Hiware Bazar':", resolver.resolve('Hiware Bazar'))
+    print("Detected:", resolver.detect())
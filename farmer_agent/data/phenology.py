@@ -0,0 +1,169 @@
+# Thermal-Time Phenology (Offline)
+# Predicts crop stage dates from accumulated growing degree days instead of fixed day offsets.
+# Each crop's 'gdd_stages' in crops.json gives the cumulative GDD (above the crop's tbase) at
+# which a stage is reached. Observed weather is accumulated incrementally, one new day at a time
+# (days with no observation since sowing count at climate normals);
+# the remaining season is predicted from the forecast followed by gridded climate normals,
+# starting at the last observed day and stopping once every pending stage has been reached.
+# All plots of a crop are processed together as (plots, days) arrays.
+import numpy as np
+
+from farmer_agent.data.agromet import crop_parameters, growing_degree_days, normals_series
+
+DEFAULT_HORIZON_DAYS = 420  # long enough for sugarcane and banana
+PREDICT_CHUNK_DAYS = 30     # days accumulated per step of a prediction
+
+
+class ThermalCalendar:
+    def __init__(self, crop, plots, sowing_dates, lat, lon, horizon_days=DEFAULT_HORIZON_DAYS):
+        params = crop_parameters(crop)
+        if not params or not params.get('gdd_stages'):
+            raise ValueError(f"No GDD stages for crop: {crop}")
+        self.crop = crop
+        self.params = params
+        stages = sorted(params['gdd_stages'].items(), key=lambda item: item[1])
+        self.stage_names = [name for name, _ in stages]
+        self.thresholds = np.array([gdd for _, gdd in stages], dtype=np.float64)
+        self.plots = list(plots)
+        self.sowing = np.asarray(sowing_dates, dtype='datetime64[D]')
+        self.lat = np.broadcast_to(np.asarray(lat, dtype=np.float64), self.sowing.shape)
+        self.lon = np.broadcast_to(np.asarray(lon, dtype=np.float64), self.sowing.shape)
+        self.horizon_days = horizon_days
+        self.season_start = self.sowing.min()
+        self.season_end = self.sowing.max() + np.timedelta64(horizon_days, 'D')
+        self._normals = None
+        # Observed state: GDD accumulated up to observed_until, and the dates stages were reached
+        self.observed_until = self.sowing.min() - np.timedelta64(1, 'D')
+        self.accumulated = np.zeros(len(self.plots))
+        self.reached = np.full((len(self.plots), len(self.stage_names)), np.datetime64('NaT'), dtype='datetime64[D]')
+        self.predicted = self.reached.copy()
+
+    def _daily_gdd(self, dates, tmin, tmax):
+        started = (dates[None, :] - self.sowing[:, None]).astype(np.int64) >= 0
+        gdd = growing_degree_days(tmin, tmax, self.params['tbase'], self.params.get('tupper'))
+        return np.where(started, gdd, 0.0)
+
+    def _crossings(self, dates, cumulative, pending):
+        """Date each pending (plot, stage) first reaches its threshold within these days, else NaT."""
+        hit = cumulative[:, :, None] >= self.thresholds[None, None, :]     # (plots, days, stages)
+        found = hit.any(axis=1) & pending
+        first = hit.argmax(axis=1)
+        result = np.full(pending.shape, np.datetime64('NaT'), dtype='datetime64[D]')
+        result[found] = dates[first[found]]
+        return result
+
+    def observe(self, dates, tmin, tmax):
+        """
+        Accumulate observed daily weather. dates: (days,); tmin, tmax: (plots, days) or (days,).
+        Days already observed are skipped, so feeding overlapping series only costs the new days.
+        Days missing between the last observation (or sowing) and the new ones, and missing
+        values, are filled from the climate normals so they still accumulate GDD.
+        """
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        new = dates > self.observed_until
+        if not new.any():
+            return
+        shape = (len(self.plots), len(new))
+        obs_min = np.broadcast_to(np.asarray(tmin, dtype=np.float64), shape)[:, new]
+        obs_max = np.broadcast_to(np.asarray(tmax, dtype=np.float64), shape)[:, new]
+        first = self.observed_until + np.timedelta64(1, 'D')
+        at = (dates[new] - first).astype(np.int64)
+        dates = first + np.arange(at.max() + 1)
+        tmin, tmax = self._temperatures(dates)
+        tmin[:, at] = np.where(np.isnan(obs_min), tmin[:, at], obs_min)
+        tmax[:, at] = np.where(np.isnan(obs_max), tmax[:, at], obs_max)
+        cumulative = self.accumulated[:, None] + np.cumsum(self._daily_gdd(dates, tmin, tmax), axis=1)
+        crossed = self._crossings(dates, cumulative, np.isnat(self.reached))
+        self.reached = np.where(np.isnat(self.reached), crossed, self.reached)
+        self.accumulated = cumulative[:, -1]
+        self.observed_until = dates[-1]
+
+    def _temperatures(self, dates):
+        """Climate-normal (tmin, tmax) for consecutive dates, from the season cache where it covers them."""
+        lo = int((dates[0] - self.season_start).astype(np.int64))
+        if lo >= 0 and lo + len(dates) <= int((self.season_end - self.season_start).astype(np.int64)):
+            return self._normal_temperatures(lo, lo + len(dates))
+        tmin, tmax = normals_series(self.lat, self.lon, dates)[:2]
+        return np.array(tmin, dtype=np.float64), np.array(tmax, dtype=np.float64)
+
+    def _normal_temperatures(self, lo, hi):
+        """Climate-normal (tmin, tmax) for season days [lo, hi); computed once for the whole season."""
+        if self._normals is None:
+            dates = self.season_start + np.arange((self.season_end - self.season_start).astype(np.int64))
+            self._normals = normals_series(self.lat, self.lon, dates)[:2]
+        return self._normals[0][:, lo:hi].copy(), self._normals[1][:, lo:hi].copy()
+
+    def predict(self, forecast=None):
+        """
+        Predict every stage not yet reached. Accumulation restarts from the day after the last
+        observation and runs a chunk of days at a time (forecast days where given, climate
+        normals elsewhere) until every pending stage is reached or the season ends. forecast is
+        a dict like ForecastSeries.daily(): 'date' (days,) with 'temp_min'/'temp_max' as (days,)
+        or (plots, days). Returns (plots, stages) datetime64[D] stage dates (NaT beyond the season).
+        """
+        pending = np.isnat(self.reached)
+        predicted = self.reached.copy()
+        accumulated = self.accumulated.copy()
+        shape = None
+        if forecast is not None and len(forecast['date']):
+            f_dates = np.asarray(forecast['date'], dtype='datetime64[D]')
+            shape = (len(self.plots), len(f_dates))
+            f_min = np.broadcast_to(np.asarray(forecast['temp_min'], dtype=np.float64), shape)
+            f_max = np.broadcast_to(np.asarray(forecast['temp_max'], dtype=np.float64), shape)
+        lo = int((max(self.observed_until + np.timedelta64(1, 'D'), self.season_start) - self.season_start).astype(np.int64))
+        total = int((self.season_end - self.season_start).astype(np.int64))
+        while pending.any() and lo < total:
+            hi = min(lo + PREDICT_CHUNK_DAYS, total)
+            dates = self.season_start + np.arange(lo, hi)
+            tmin, tmax = self._normal_temperatures(lo, hi)
+            if shape is not None:
+                pos = (f_dates - self.season_start).astype(np.int64) - lo
+                inside = (pos >= 0) & (pos < hi - lo)
+                if inside.any():
+                    at = pos[inside]
+                    tmin[:, at] = np.where(np.isnan(f_min[:, inside]), tmin[:, at], f_min[:, inside])
+                    tmax[:, at] = np.where(np.isnan(f_max[:, inside]), tmax[:, at], f_max[:, inside])
+            cumulative = accumulated[:, None] + np.cumsum(self._daily_gdd(dates, tmin, tmax), axis=1)
+            crossed = self._crossings(dates, cumulative, pending)
+            predicted = np.where(np.isnat(crossed), predicted, crossed)
+            pending &= np.isnat(crossed)
+            accumulated = cumulative[:, -1]
+            lo = hi
+        self.predicted = predicted
+        return self.predicted
+
+    def schedules(self):
+        """One date-sorted list per plot of {'date', 'crop', 'activity', 'plot', 'observed'} stage entries."""
+        result = []
+        for p, plot in enumerate(self.plots):
+            entries = [{'date': str(self.predicted[p, s]), 'crop': self.crop, 'activity': name, 'plot': plot,
+                        'observed': not np.isnat(self.reached[p, s])}
+                       for s, name in enumerate(self.stage_names) if not np.isnat(self.predicted[p, s])]
+            result.append(sorted(entries, key=lambda e: e['date']))
+        return result
+
+    def sync_reminders(self, reminders, from_date=None):
+        """
+        Keep one reminder per predicted stage, labelled "<stage> (<plot>)". The stage reminders
+        already in the store are looked up, so syncing is idempotent (also across restarts):
+        a missing reminder is added and one whose predicted date changed is moved. Returns the
+        number of reminders added or moved.
+        """
+        from_date = np.datetime64(from_date or 'today', 'D')
+        existing = {}
+        for record in reminders.store.query(crop=self.crop, user=reminders.user):
+            if not record.get('recurring'):
+                existing.setdefault(record['activity'], []).append(record['date'])
+        changed = 0
+        for p, s in zip(*np.nonzero(~np.isnat(self.predicted) & np.isnat(self.reached))):
+            if self.predicted[p, s] < from_date:
+                continue
+            date = str(self.predicted[p, s])
+            label = f"{self.stage_names[s]} ({self.plots[p]})"
+            dates = existing.get(label, [])
+            if date in dates:
+                continue
+            if not (dates and reminders.store.move(self.crop, label, dates[-1], date, user=reminders.user)):
+                reminders.store.add(self.crop, label, date, user=reminders.user)
+            changed += 1
+        return changed
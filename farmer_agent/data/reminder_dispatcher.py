@@ -0,0 +1,228 @@
+# Reminder Dispatcher (Offline)
+# Background thread that fires reminders when they come due. Due reminders are kept in a
+# min-heap keyed by due time and the thread sleeps on a condition variable until the earliest
+# one is due (or a new reminder becomes the earliest), so an idle device uses no CPU.
+# Reminders are loaded one window (a few days) at a time and new ones are pushed as the store
+# reports them; subscribers (UI notification, TTS, log) receive each reminder as it fires.
+# Progress is saved in the store, so a restart fires only what came due since the last run.
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import date as Date, datetime, time as Time, timedelta
+
+from farmer_agent.data.reminder_store import expand_rule, get_reminder_store
+
+# Reminders carry a date only; they fire at this local hour on that date
+DUE_HOUR = 7
+# Days of reminders held in the heap at once; the next window is loaded when this one ends
+WINDOW_DAYS = 7
+# Store meta key with the due time (epoch seconds) of the last reminder dispatched
+DISPATCHED_KEY = 'dispatched_until'
+# Reminders missed while the app was not running are caught up for at most this many days
+CATCH_UP_DAYS = 7
+
+
+class ReminderDispatcher:
+    def __init__(self, store=None, due_hour=DUE_HOUR, window_days=WINDOW_DAYS, catch_up=True, catch_up_days=CATCH_UP_DAYS):
+        """
+        store: reminder store to watch (default: the shared store).
+        catch_up: on start, fire reminders that came due since the last one dispatched (up to
+        catch_up_days back; from today's midnight on the first run).
+        """
+        self.store = store or get_reminder_store()
+        self.due_hour = due_hour
+        self.window_days = window_days
+        self.catch_up = catch_up
+        self.catch_up_days = catch_up_days
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._subscribers = []
+        self._thread = None
+        self._stopping = False
+        self._window_start = None
+        self._window_end = None
+        self._unsubscribe = None
+
+    def subscribe(self, callback):
+        """Call callback(reminder) for every reminder that comes due. Returns a function that unsubscribes."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def due_time(self, record):
+        """Epoch seconds at which a reminder record fires."""
+        return datetime.combine(Date.fromisoformat(record['date']), Time(self.due_hour)).timestamp()
+
+    def _push(self, records, earliest=None, late=None):
+        """
+        Add records inside the current window to the heap; call with the condition held.
+        Records due before `earliest` are skipped; those due before `late` fire at `late`.
+        """
+        wake = False
+        for record in records:
+            if not (self._window_start <= record['date'] < self._window_end):
+                continue
+            due = self.due_time(record)
+            if earliest is not None and due < earliest:
+                continue
+            if late is not None and due < late:
+                due = late
+            if not self._heap or due < self._heap[0][0]:
+                wake = True
+            heapq.heappush(self._heap, (due, next(self._seq), record))
+        if wake:
+            self._cond.notify()
+
+    def _load_window(self, start_day, earliest):
+        """Replace the window with [start_day, start_day + window_days) and load it from the store."""
+        self._window_start = start_day.isoformat()
+        self._window_end = (start_day + timedelta(days=self.window_days)).isoformat()
+        records = self.store.query(start=self._window_start, end=self._window_end)
+        self._push(records, earliest)
+
+    def _on_change(self, event, payload):
+        with self._cond:
+            if self._window_start is None:
+                return
+            # Reminders added for today after their due hour fire right away
+            today = datetime.combine(Date.today(), Time()).timestamp()
+            now = time.time()
+            if event == 'add':
+                self._push(payload, today, now)
+            elif event == 'rule':
+                self._push(expand_rule(payload, self._window_start, self._window_end), today, now)
+            # Deleted reminders are left in the heap and dropped when they come due
+
+    def _still_scheduled(self, record):
+        next_day = (Date.fromisoformat(record['date']) + timedelta(days=1)).isoformat()
+        matches = self.store.query(start=record['date'], end=next_day, crop=record['crop'],
+                                   activity=record['activity'], user=record.get('user', ''))
+        return any(m['activity'] == record['activity'] for m in matches)
+
+    def _dispatched_until(self):
+        try:
+            value = self.store.get_meta(DISPATCHED_KEY)
+            return float(value) if value is not None else None
+        except (AttributeError, ValueError) as e:
+            logging.warning(f"Reminder dispatch progress unavailable: {e}")
+            return None
+
+    def _mark_dispatched(self, due):
+        try:
+            self.store.set_meta(DISPATCHED_KEY, repr(due))
+        except Exception as e:
+            logging.error(f"Reminder dispatch progress not saved: {e}")
+
+    def _publish(self, record):
+        for callback in list(self._subscribers):
+            try:
+                callback(record)
+            except Exception as e:
+                logging.error(f"Reminder subscriber error: {e}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    now = time.time()
+                    window_end = datetime.combine(Date.fromisoformat(self._window_end), Time()).timestamp()
+                    if now >= window_end:
+                        self._load_window(Date.fromisoformat(self._window_end), None)
+                        continue
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    next_wake = self._heap[0][0] if self._heap else window_end
+                    self._cond.wait(min(next_wake, window_end) - now)
+                if self._stopping:
+                    return
+                due, _, record = heapq.heappop(self._heap)
+                # Saved once every reminder due at this time has been handled
+                done = not self._heap or self._heap[0][0] > due
+            if self._still_scheduled(record):
+                self._publish(record)
+            if done:
+                self._mark_dispatched(due)
+
+    def start(self):
+        """Load the current window and start the dispatcher thread (idempotent)."""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return self
+            self._stopping = False
+            self._heap = []
+            self._seq = itertools.count()
+            today = Date.today()
+            start_day = today
+            if self.catch_up:
+                last = self._dispatched_until()
+                if last is None:
+                    earliest = datetime.combine(today, Time()).timestamp()
+                else:
+                    floor = datetime.combine(today - timedelta(days=self.catch_up_days), Time()).timestamp()
+                    # Reminders due at exactly `last` were already dispatched
+                    earliest = max(last + 1e-3, floor)
+                    start_day = min(Date.fromtimestamp(earliest), today)
+            else:
+                earliest = time.time()
+            self._load_window(start_day, earliest)
+        self._unsubscribe = self.store.subscribe(self._on_change)
+        self._thread = threading.Thread(target=self._run, name='reminder-dispatcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._thread:
+            self._thread.join()
+
+    def pending(self):
+        """Reminders waiting in the heap, earliest first."""
+        with self._cond:
+            return [record for _, _, record in sorted(self._heap, key=lambda item: item[:2])]
+
+
+def log_sink(record):
+    """Subscriber that logs each reminder."""
+    user = f" [{record['user']}]" if record.get('user') else ''
+    logging.info(f"Reminder{user}: {record['activity']} {record['crop']} ({record['date']})")
+
+
+def tts_sink(record):
+    """Subscriber that reads each reminder aloud (pyttsx3 is loaded on first use)."""
+    from farmer_agent.nlp.tts import speak
+    try:
+        speak(f"Reminder: {record['activity']} {record['crop']}")
+    except ImportError as e:
+        logging.warning(f"Reminder not spoken: {e}")
+
+
+_shared_dispatcher = None
+_shared_lock = threading.Lock()
+
+
+def get_reminder_dispatcher():
+    """Process-wide dispatcher on the shared reminder store (not started until start() is called)."""
+    global _shared_dispatcher
+    with _shared_lock:
+        if _shared_dispatcher is None:
+            _shared_dispatcher = ReminderDispatcher()
+        return _shared_dispatcher
+
+
+if __name__ == "__main__":
+    dispatcher = get_reminder_dispatcher()
+    dispatcher.subscribe(lambda r: print("Due:", r))
+    dispatcher.start()
+    print("Waiting for reminders (Ctrl+C to stop). Pending:", dispatcher.pending())
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        dispatcher.stop()
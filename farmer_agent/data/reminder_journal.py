@@ -0,0 +1,349 @@
+# Journaled Reminder Storage (Offline)
+# Alternative to the SQLite reminder store for devices where SQLite files are unwelcome: every
+# change is appended to a journal as one small JSON line (O(1) per write), and a background
+# compaction folds the journal into a snapshot once it grows. Loading reads the snapshot and
+# replays its journal; a torn last line left by a crash is ignored and trimmed.
+# All writers take a file lock and first replay whatever other instances (or processes) have
+# appended, so concurrent stores never lose each other's updates.
+import json
+import os
+import threading
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from datetime import date as Date
+
+from farmer_agent.data.reminder_store import DATA_DIR, REMINDER_FILE, check_rule, expand_rule, last_occurrence, reminder_record
+from farmer_agent.utils.file_utils import file_lock
+
+REMINDER_JOURNAL_DIR = os.path.join(DATA_DIR, 'reminders_journal')
+# Journal records appended since the last snapshot before a background compaction starts
+COMPACT_RECORDS = 2000
+
+
+class JournalReminderStore:
+    def __init__(self, directory=REMINDER_JOURNAL_DIR, json_path=REMINDER_FILE, compact_records=COMPACT_RECORDS):
+        self.directory = directory
+        self.compact_records = compact_records
+        self.snapshot_path = os.path.join(directory, 'snapshot.json')
+        self.lock_path = os.path.join(directory, 'journal.lock')
+        self._lock = threading.RLock()
+        self._held = False
+        self._listeners = []
+        self._journal = None
+        self._compacting = None
+        os.makedirs(directory, exist_ok=True)
+        with self._locked():
+            if not os.path.exists(self.snapshot_path) and not os.path.exists(self._journal_path(0)):
+                self._write_snapshot(0, self._import_json(json_path))
+
+    # State and replay
+
+    def _reset(self, generation, state):
+        self.generation = generation
+        self.next_id = state.get('next_id', 1)
+        self.reminders = {r[0]: r for r in (tuple(r) for r in state.get('reminders', []))}
+        self.by_date = sorted((r[4], r[0]) for r in self.reminders.values())
+        self.rules = {r['id']: r for r in state.get('rules', [])}
+        self.meta = dict(state.get('meta', {}))
+        self.records = 0
+        self.offset = 0
+        if self._journal:
+            self._journal.close()
+        self._journal = open(self._journal_path(generation), 'a+b')
+
+    def _journal_path(self, generation):
+        return os.path.join(self.directory, f"journal.{generation}.jsonl")
+
+    def _import_json(self, json_path):
+        """Initial state from a legacy reminders.json (empty if there is none)."""
+        if not json_path or not os.path.exists(json_path):
+            return {}
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Reminder migration skipped: {e}")
+            return {}
+        rows = [(i, r.get('user', ''), r['crop'], r['activity'], r['date'], int(bool(r.get('recurring'))))
+                for i, r in enumerate((r for r in records if r.get('crop') and r.get('activity') and r.get('date')), 1)]
+        return {'next_id': len(rows) + 1, 'reminders': rows}
+
+    def _read_generation(self):
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                return json.loads(f.readline())['generation']
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def _load(self):
+        """Load the current snapshot (header line, then state) and start at its journal."""
+        generation, state = 0, {}
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                generation = json.loads(f.readline())['generation']
+                state = json.loads(f.readline() or '{}')
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Reminder snapshot load error: {e}")
+        self._reset(generation, state)
+        if generation:
+            # Left behind if a compaction was interrupted after writing the snapshot
+            try:
+                os.remove(self._journal_path(generation - 1))
+            except OSError:
+                pass
+
+    def _catch_up(self):
+        """Apply journal records appended since this instance last looked; call with the file lock held."""
+        if self._journal is None or self._read_generation() != self.generation:
+            self._load()
+        self._journal.seek(self.offset)
+        data = self._journal.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            # A writer died mid-record; nobody else can be writing while we hold the lock
+            self._journal.truncate(self.offset + end)
+        for line in data[:end].splitlines():
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Reminder journal record skipped: {e}")
+            self.records += 1
+        self.offset += end
+
+    def _apply(self, op):
+        kind = op['op']
+        if kind == 'add':
+            for user, crop, activity, date, recurring in op['rows']:
+                self.reminders[self.next_id] = (self.next_id, user, crop, activity, date, recurring)
+                insort(self.by_date, (date, self.next_id))
+                self.next_id += 1
+        elif kind == 'rule':
+            self.rules[self.next_id] = dict(op['rule'], id=self.next_id)
+            self.next_id += 1
+            return self.next_id - 1
+        elif kind == 'move':
+            found = self._matching(op['crop'], op['activity'], op['user'], op['old_date'], exact=True)
+            if found:
+                _, user, crop, activity, date, recurring = self.reminders[found[0]]
+                self._remove(found[:1])
+                self.reminders[found[0]] = (found[0], user, crop, activity, op['new_date'], recurring)
+                insort(self.by_date, (op['new_date'], found[0]))
+            return len(found[:1])
+        elif kind == 'delete':
+            return self._delete(op['crop'], op.get('activity'), op.get('date'), op.get('user'))
+        elif kind == 'meta':
+            self.meta[op['key']] = op['value']
+        return 0
+
+    def _matching(self, crop, activity, user, date, exact=False):
+        """Ids of one-off reminders matching, in id order; exact compares activity case-sensitively."""
+        crop = crop.lower()
+        if date:
+            lo = bisect_left(self.by_date, (date,))
+            hi = bisect_left(self.by_date, (date, self.next_id))
+            candidates = [self.reminders[rid] for _, rid in self.by_date[lo:hi]]
+        else:
+            candidates = self.reminders.values()
+        found = []
+        for rid, r_user, r_crop, r_activity, _, _ in candidates:
+            if r_crop.lower() != crop or (user is not None and r_user != user):
+                continue
+            if activity and (r_activity != activity if exact else r_activity.lower() != activity.lower()):
+                continue
+            found.append(rid)
+        return sorted(found)
+
+    def _remove(self, ids):
+        for rid in ids:
+            record = self.reminders.pop(rid)
+            i = bisect_left(self.by_date, (record[4], rid))
+            del self.by_date[i]
+
+    def _delete(self, crop, activity, date, user):
+        ids = self._matching(crop, activity, user, date)
+        self._remove(ids)
+        removed = len(ids)
+        for rule_id, rule in list(self.rules.items()):
+            if rule['crop'].lower() != crop.lower() or (user is not None and rule['user'] != user):
+                continue
+            if activity and rule['activity'].lower() != activity.lower():
+                continue
+            if not date:
+                del self.rules[rule_id]
+                removed += 1
+                continue
+            exceptions = json.loads(rule['exceptions'])
+            offset = Date.fromisoformat(date).toordinal() - Date.fromisoformat(rule['start']).toordinal()
+            if date in exceptions or not rule['start'] <= date <= rule['last'] or offset % rule['interval_days']:
+                continue
+            rule['exceptions'] = json.dumps(sorted(exceptions + [date]))
+            removed += 1
+        return removed
+
+    # Writes
+
+    @contextmanager
+    def _locked(self):
+        """The instance lock plus, at the outermost level, the cross-process file lock."""
+        with self._lock:
+            if self._held:
+                yield
+                return
+            with file_lock(self.lock_path):
+                self._held = True
+                try:
+                    yield
+                finally:
+                    self._held = False
+
+    def _append(self, op):
+        """Catch up, journal one change and apply it; returns what applying it returned."""
+        with self._locked():
+            self._catch_up()
+            line = (json.dumps(op, ensure_ascii=False) + '\n').encode('utf-8')
+            self._journal.write(line)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self.offset += len(line)
+            self.records += 1
+            result = self._apply(op)
+            if self.records >= self.compact_records:
+                self._compact_in_background()
+        return result
+
+    def subscribe(self, callback):
+        """
+        Same events as SQLiteReminderStore.subscribe, for changes made through this instance.
+        Returns a function that unsubscribes.
+        """
+        self._listeners.append(callback)
+        return lambda: self._listeners.remove(callback)
+
+    def _notify(self, event, payload=None):
+        for callback in list(self._listeners):
+            try:
+                callback(event, payload)
+            except Exception as e:
+                print(f"Reminder listener error: {e}")
+
+    def add(self, crop, activity, date, user='', recurring=False):
+        return self.add_many([(crop, activity, date, recurring)], user=user)
+
+    def add_many(self, reminders, user=''):
+        """Journal (crop, activity, date, recurring) tuples as one record; returns the count."""
+        rows = [[user or '', crop, activity, date, int(bool(recurring))] for crop, activity, date, recurring in reminders]
+        if rows:
+            self._append({'op': 'add', 'rows': rows})
+        self._notify('add', [reminder_record(dict(zip(('user', 'crop', 'activity', 'date', 'recurring'), row))) for row in rows])
+        return len(rows)
+
+    def move(self, crop, activity, old_date, new_date, user=''):
+        """Move one one-off reminder to a new date; returns True if a reminder was moved."""
+        moved = self._append({'op': 'move', 'crop': crop, 'activity': activity, 'old_date': old_date,
+                              'new_date': new_date, 'user': user or ''})
+        if moved:
+            self._notify('add', [reminder_record({'user': user or '', 'crop': crop, 'activity': activity,
+                                                  'date': new_date, 'recurring': 0})])
+        return bool(moved)
+
+    def add_rule(self, crop, activity, start, interval_days, count=None, until=None, exceptions=(), user=''):
+        """Journal a recurring reminder as a single rule (see SQLiteReminderStore.add_rule)."""
+        check_rule(start, interval_days, count, until)
+        rule = {'user': user or '', 'crop': crop, 'activity': activity, 'start': start, 'interval_days': interval_days,
+                'last': last_occurrence(start, interval_days, count, until), 'exceptions': json.dumps(sorted(exceptions))}
+        rule_id = self._append({'op': 'rule', 'rule': rule})
+        self._notify('rule', rule)
+        return rule_id
+
+    def delete(self, crop, activity=None, date=None, user=None):
+        """Delete reminders like SQLiteReminderStore.delete; returns the number affected."""
+        removed = self._append({'op': 'delete', 'crop': crop, 'activity': activity, 'date': date, 'user': user})
+        if removed:
+            self._notify('delete')
+        return removed
+
+    def set_meta(self, key, value):
+        """Journal a bookkeeping value (see SQLiteReminderStore.set_meta)."""
+        self._append({'op': 'meta', 'key': key, 'value': str(value)})
+
+    # Reads
+
+    def get_meta(self, key, default=None):
+        with self._locked():
+            self._catch_up()
+            return self.meta.get(key, default)
+
+    def query(self, start=None, end=None, crop=None, activity=None, user=None):
+        """
+        Reminders with start <= date < end (ISO strings, either open), ordered by date.
+        crop matches case-insensitively; activity is a case-insensitive substring.
+        """
+        with self._locked():
+            self._catch_up()
+            lo = bisect_left(self.by_date, (start,)) if start else 0
+            hi = bisect_left(self.by_date, (end,)) if end else len(self.by_date)
+            candidates = [self.reminders[rid] for _, rid in self.by_date[lo:hi]]
+            rules = list(self.rules.values())
+        crop = crop.lower() if crop else None
+        activity = activity.lower() if activity else None
+
+        def wanted(r_user, r_crop, r_activity):
+            return ((user is None or r_user == user) and (crop is None or r_crop.lower() == crop)
+                    and (activity is None or activity in r_activity.lower()))
+
+        records = [reminder_record({'user': u, 'crop': c, 'activity': a, 'date': d, 'recurring': rec})
+                   for _, u, c, a, d, rec in candidates if wanted(u, c, a)]
+        expanded = False
+        for rule in rules:
+            if (start and rule['last'] < start) or (end and rule['start'] >= end):
+                continue
+            if wanted(rule['user'], rule['crop'], rule['activity']):
+                records.extend(expand_rule(rule, start, end))
+                expanded = True
+        if expanded:
+            records.sort(key=lambda r: r['date'])
+        return records
+
+    # Compaction
+
+    def compact(self):
+        """Fold the journal into a new snapshot and start an empty journal."""
+        with self._locked():
+            self._catch_up()
+            state = {'next_id': self.next_id, 'reminders': sorted(self.reminders.values()),
+                     'rules': [self.rules[k] for k in sorted(self.rules)], 'meta': self.meta}
+            # The snapshot names the new generation, so from here on the old journal is never replayed
+            self._write_snapshot(self.generation + 1, state)
+            self._load()
+
+    def _write_snapshot(self, generation, state):
+        tmp_file = f"{self.snapshot_path}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'generation': generation}) + '\n')
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_path)
+
+    def _compact_in_background(self):
+        if self._compacting and self._compacting.is_alive():
+            return
+        self._compacting = threading.Thread(target=self._compact_quietly, name='reminder-compaction', daemon=True)
+        self._compacting.start()
+
+    def _compact_quietly(self):
+        try:
+            self.compact()
+        except OSError as e:
+            print(f"Reminder compaction error: {e}")
+
+    def close(self):
+        if self._compacting:
+            self._compacting.join()
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
@@ -0,0 +1,322 @@
+# Reminder Storage (Offline)
+# SQLite-backed reminder records indexed on date, crop and user, so inserts are O(log n) and
+# upcoming/range queries are index scans instead of full-list scans. reminders.json is imported
+# once on first use; later writes go to the database only.
+# Recurring reminders are stored as one rule (start, interval, count/until, exceptions) and
+# expanded into occurrences only for the date window a query asks for.
+import json
+import os
+import sqlite3
+import threading
+from datetime import date as Date
+
+from farmer_agent.utils.env_loader import load_env_local
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+REMINDER_FILE = os.path.join(DATA_DIR, 'reminders.json')
+REMINDER_DB = os.path.join(DATA_DIR, 'reminders.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL DEFAULT '',
+    crop TEXT NOT NULL COLLATE NOCASE,
+    activity TEXT NOT NULL,
+    date TEXT NOT NULL,
+    recurring INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_date ON reminders (date);
+CREATE INDEX IF NOT EXISTS idx_reminders_crop_date ON reminders (crop, date);
+CREATE INDEX IF NOT EXISTS idx_reminders_user_date ON reminders (user, date);
+CREATE TABLE IF NOT EXISTS rules (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL DEFAULT '',
+    crop TEXT NOT NULL COLLATE NOCASE,
+    activity TEXT NOT NULL,
+    start TEXT NOT NULL,
+    interval_days INTEGER NOT NULL,
+    last TEXT NOT NULL,
+    exceptions TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_rules_user_last ON rules (user, last);
+CREATE INDEX IF NOT EXISTS idx_rules_crop_last ON rules (crop, last);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def reminder_record(row):
+    """Reminder dict in the shape reminders.json always used ('recurring' and 'user' only when set)."""
+    record = {'crop': row['crop'], 'activity': row['activity'], 'date': row['date']}
+    if row['recurring']:
+        record['recurring'] = True
+    if row['user']:
+        record['user'] = row['user']
+    return record
+
+
+def rule_occurrences(start, interval_days, last, window_start=None, window_end=None, exceptions=()):
+    """
+    ISO dates of a rule's occurrences with window_start <= date < window_end (either open),
+    computed arithmetically so only the occurrences inside the window are produced.
+    """
+    first = Date.fromisoformat(start).toordinal()
+    stop = Date.fromisoformat(last).toordinal()
+    if window_end:
+        stop = min(stop, Date.fromisoformat(window_end).toordinal() - 1)
+    k = 0
+    if window_start:
+        k = max(0, -(-(Date.fromisoformat(window_start).toordinal() - first) // interval_days))
+    skip = set(exceptions)
+    dates = []
+    for day in range(first + k * interval_days, stop + 1, interval_days):
+        iso = Date.fromordinal(day).isoformat()
+        if iso not in skip:
+            dates.append(iso)
+    return dates
+
+
+def check_rule(start, interval_days, count=None, until=None):
+    """Raise ValueError for a recurring reminder that would have no occurrences."""
+    if interval_days < 1:
+        raise ValueError("interval_days must be at least 1")
+    if count is None and until is None:
+        raise ValueError("A recurring reminder needs a count or an until date")
+    if count is not None and count < 1:
+        raise ValueError("count must be at least 1")
+    if until is not None and until < start:
+        raise ValueError("until must not be before start")
+
+
+def last_occurrence(start, interval_days, count=None, until=None):
+    """ISO date of a rule's final occurrence, bounded by count and/or until."""
+    first = Date.fromisoformat(start).toordinal()
+    bounds = []
+    if count is not None:
+        bounds.append(first + (count - 1) * interval_days)
+    if until is not None:
+        end = Date.fromisoformat(until).toordinal()
+        bounds.append(first + (end - first) // interval_days * interval_days)
+    return Date.fromordinal(min(bounds)).isoformat()
+
+
+def expand_rule(rule, window_start=None, window_end=None):
+    """Reminder records for a rule's occurrences inside a window."""
+    return [reminder_record({**rule, 'date': day, 'recurring': True})
+            for day in rule_occurrences(rule['start'], rule['interval_days'], rule['last'], window_start,
+                                        window_end, json.loads(rule['exceptions']))]
+
+
+class SQLiteReminderStore:
+    def __init__(self, path=REMINDER_DB, json_path=REMINDER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock, self.conn:
+            self.conn.executescript(SCHEMA)
+        self.migrate_json(json_path)
+
+    def migrate_json(self, json_path):
+        """Import a legacy reminders.json once; returns the number of records imported."""
+        with self._lock:
+            done = self.conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if done or not json_path or not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Reminder migration skipped: {e}")
+            return 0
+        rows = [(r.get('user', ''), r['crop'], r['activity'], r['date'], int(bool(r.get('recurring'))))
+                for r in records if r.get('crop') and r.get('activity') and r.get('date')]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO reminders (user, crop, activity, date, recurring) VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (str(len(rows)),))
+        return len(rows)
+
+    def get_meta(self, key, default=None):
+        """A value saved with set_meta (strings), or default."""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else default
+
+    def set_meta(self, key, value):
+        """Persist a small piece of bookkeeping (e.g. the dispatcher's progress) with the reminders."""
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def subscribe(self, callback):
+        """
+        Call callback(event, payload) after each committed change: ('add', [records]),
+        ('rule', rule dict) or ('delete', None). Returns a function that unsubscribes.
+        """
+        self._listeners.append(callback)
+        return lambda: self._listeners.remove(callback)
+
+    def _notify(self, event, payload=None):
+        for callback in list(self._listeners):
+            try:
+                callback(event, payload)
+            except Exception as e:
+                print(f"Reminder listener error: {e}")
+
+    def add(self, crop, activity, date, user='', recurring=False):
+        return self.add_many([(crop, activity, date, recurring)], user=user)
+
+    def add_many(self, reminders, user=''):
+        """Insert (crop, activity, date, recurring) tuples in one transaction; returns the count."""
+        rows = [(user or '', crop, activity, date, int(bool(recurring))) for crop, activity, date, recurring in reminders]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO reminders (user, crop, activity, date, recurring) VALUES (?, ?, ?, ?, ?)", rows)
+        self._notify('add', [reminder_record(dict(zip(('user', 'crop', 'activity', 'date', 'recurring'), row))) for row in rows])
+        return len(rows)
+
+    def move(self, crop, activity, old_date, new_date, user=''):
+        """Move one one-off reminder to a new date; returns True if a reminder was moved."""
+        with self._lock, self.conn:
+            moved = self.conn.execute(
+                "UPDATE reminders SET date = ? WHERE id = (SELECT id FROM reminders WHERE user = ? AND crop = ? "
+                "AND activity = ? AND date = ? LIMIT 1)", (new_date, user or '', crop, activity, old_date)).rowcount
+        if moved:
+            self._notify('add', [reminder_record({'user': user or '', 'crop': crop, 'activity': activity,
+                                                  'date': new_date, 'recurring': 0})])
+        return bool(moved)
+
+    def add_rule(self, crop, activity, start, interval_days, count=None, until=None, exceptions=(), user=''):
+        """
+        Store a recurring reminder as a single rule: every interval_days from start (ISO date),
+        for count occurrences and/or until a date, skipping the dates in exceptions.
+        """
+        check_rule(start, interval_days, count, until)
+        rule = {'user': user or '', 'crop': crop, 'activity': activity, 'start': start, 'interval_days': interval_days,
+                'last': last_occurrence(start, interval_days, count, until), 'exceptions': json.dumps(sorted(exceptions))}
+        with self._lock, self.conn:
+            rule_id = self.conn.execute(
+                "INSERT INTO rules (user, crop, activity, start, interval_days, last, exceptions) "
+                "VALUES (:user, :crop, :activity, :start, :interval_days, :last, :exceptions)", rule).lastrowid
+        self._notify('rule', rule)
+        return rule_id
+
+    def delete(self, crop, activity=None, date=None, user=None):
+        """
+        Delete reminders for a crop (case-insensitive), optionally narrowed by activity and date.
+        Deleting one date of a recurring rule records it as an exception. Returns the number of
+        one-off reminders and rules affected.
+        """
+        where = "crop = ?"
+        params = [crop]
+        if activity:
+            where += " AND activity = ? COLLATE NOCASE"
+            params.append(activity)
+        if user is not None:
+            where += " AND user = ?"
+            params.append(user)
+        removed = self._delete(where, params, date)
+        if removed:
+            self._notify('delete')
+        return removed
+
+    def _delete(self, where, params, date):
+        with self._lock, self.conn:
+            if not date:
+                removed = self.conn.execute(f"DELETE FROM reminders WHERE {where}", params).rowcount
+                return removed + self.conn.execute(f"DELETE FROM rules WHERE {where}", params).rowcount
+            removed = self.conn.execute(f"DELETE FROM reminders WHERE {where} AND date = ?", params + [date]).rowcount
+            rules = self.conn.execute(
+                f"SELECT id, start, interval_days, last, exceptions FROM rules WHERE {where} AND start <= ? AND last >= ?",
+                params + [date, date]).fetchall()
+            for rule in rules:
+                exceptions = json.loads(rule['exceptions'])
+                offset = Date.fromisoformat(date).toordinal() - Date.fromisoformat(rule['start']).toordinal()
+                if date in exceptions or offset % rule['interval_days']:
+                    continue
+                self.conn.execute("UPDATE rules SET exceptions = ? WHERE id = ?",
+                                  (json.dumps(sorted(exceptions + [date])), rule['id']))
+                removed += 1
+            return removed
+
+    def query(self, start=None, end=None, crop=None, activity=None, user=None):
+        """
+        Reminders with start <= date < end (ISO strings, either open), ordered by date.
+        crop matches case-insensitively; activity is a case-insensitive substring.
+        """
+        clauses, params = [], []
+        if user is not None:
+            clauses.append("user = ?")
+            params.append(user)
+        if crop:
+            clauses.append("crop = ?")
+            params.append(crop)
+        if start:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end:
+            clauses.append("date < ?")
+            params.append(end)
+        if activity:
+            clauses.append("instr(lower(activity), ?) > 0")
+            params.append(activity.lower())
+        sql = "SELECT user, crop, activity, date, recurring FROM reminders"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY date, id"
+        with self._lock:
+            records = [reminder_record(row) for row in self.conn.execute(sql, params)]
+            rules = self._rules_in_window(start, end, crop, activity, user)
+        if not rules:
+            return records
+        for rule in rules:
+            records.extend(expand_rule(rule, start, end))
+        records.sort(key=lambda r: r['date'])
+        return records
+
+    def _rules_in_window(self, start, end, crop, activity, user):
+        clauses, params = [], []
+        if user is not None:
+            clauses.append("user = ?")
+            params.append(user)
+        if crop:
+            clauses.append("crop = ?")
+            params.append(crop)
+        if start:
+            clauses.append("last >= ?")
+            params.append(start)
+        if end:
+            clauses.append("start < ?")
+            params.append(end)
+        if activity:
+            clauses.append("instr(lower(activity), ?) > 0")
+            params.append(activity.lower())
+        sql = "SELECT user, crop, activity, start, interval_days, last, exceptions FROM rules"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self.conn.execute(sql + " ORDER BY id", params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_reminder_store():
+    """
+    Process-wide reminder store, so every Reminders object and the dispatcher see the same changes.
+    REMINDER_BACKEND=journal selects the append-only journal store instead of SQLite.
+    """
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            load_env_local()
+            if os.environ.get('REMINDER_BACKEND', 'sqlite').lower() == 'journal':
+                from farmer_agent.data.reminder_journal import JournalReminderStore
+                _shared_store = JournalReminderStore()
+            else:
+                _shared_store = SQLiteReminderStore()
+        return _shared_store
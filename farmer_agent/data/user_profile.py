@@ -1,18 +1,413 @@
 
 # User History & Profiling (Offline)
 # Multi-user support: switch and manage multiple user profiles
+# Each user's history is kept in its own file under data/users/, so saving one user's query
+# never reads or rewrites anyone else's. The old single user_history.json is split into
+# per-user files the first time profiles are used and is left untouched afterwards.
+# Queries are appended to a per-user JSON Lines log (<user>.jsonl) next to a small metadata
+# record (<user>.json), so adding a query costs one appended line however long the history is.
+# Advisories are stored once in the shared advisory blob store; log lines carry only their hash.
+# A small user index (users/index.json: file, created/last-active times, query count per user)
+# lets listing and switching users skip everyone's history. Adding a query only appends to the
+# user's log; the new queries are added to the index entry with the batched fsync (and at exit),
+# and the entry is recounted from the log when the profile is saved, created or cleared. The index
+# can always be rebuilt from the per-user files.
 
+import atexit
+import hashlib
 import json
 import os
+import re
+import threading
+import time
+import weakref
 from datetime import datetime
 
+from farmer_agent.data.advisory_store import AdvisoryStore, get_advisory_store
+from farmer_agent.utils.file_utils import file_lock
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 HISTORY_FILE = os.path.join(DATA_DIR, 'user_history.json')
+USERS_DIR = os.path.join(DATA_DIR, 'users')
+MIGRATED_MARKER = '.migrated'
+INDEX_FILE = 'index.json'
+# Appended queries are flushed at once but fsync'd at most this often (and at exit)
+FSYNC_INTERVAL = 1.0
+
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+
+def user_file(username, users_dir=USERS_DIR):
+    """Per-user history file: a readable slug plus a short hash so distinct names never collide."""
+    slug = re.sub(r'[^a-z0-9_-]+', '_', username.lower()).strip('_')[:40] or 'user'
+    digest = hashlib.sha1(username.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(users_dir, f"{slug}-{digest}.json")
+
+
+def write_json_atomic(path, data):
+    tmp_file = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, path)
+
+
+def migrate_history(history_file=HISTORY_FILE, users_dir=USERS_DIR):
+    """
+    Split the monolithic user_history.json into per-user files (once; safe to call from
+    several processes). Users that already have their own file keep it. Returns the number
+    of users migrated.
+    """
+    with _migrate_lock:
+        if users_dir in _migrated:
+            return 0
+        os.makedirs(users_dir, exist_ok=True)
+        marker = os.path.join(users_dir, MIGRATED_MARKER)
+        migrated = 0
+        with file_lock(os.path.join(users_dir, '.lock')):
+            if not os.path.exists(marker):
+                data = {}
+                if os.path.exists(history_file):
+                    try:
+                        with open(history_file, 'r', encoding='utf-8') as f:
+                            data = json.load(f)
+                    except (OSError, ValueError) as e:
+                        print(f"User history migration skipped: {e}")
+                for username, history in data.items():
+                    path = user_file(username, users_dir)
+                    if not os.path.exists(path):
+                        write_json_atomic(path, dict(history, username=username))
+                        migrated += 1
+                with open(marker, 'w', encoding='utf-8') as f:
+                    f.write(datetime.utcnow().isoformat())
+        _migrated.add(users_dir)
+        return migrated
+
+
+def load_user_history(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_all_histories(users_dir=USERS_DIR):
+    """{username: {'meta', 'queries'}} for every user; advisories stay as 'advisory_ref' hashes (see resolve_record)."""
+    migrate_history(users_dir=users_dir)
+    histories = {}
+    for name in sorted(os.listdir(users_dir)):
+        if name.endswith('.json'):
+            path = os.path.join(users_dir, name)
+            history = load_user_history(path)
+            if name != INDEX_FILE and 'username' in history:
+                queries = history.get('queries') or QueryLog(query_log_file(path)).read_all()
+                histories[history.pop('username')] = dict(history, queries=queries)
+    return histories
+
+
+def compact_record(record):
+    """A history record with its advisory moved to the advisory store (referenced by 'advisory_ref')."""
+    advisory = record.get('advisory')
+    if not isinstance(advisory, dict):
+        return record
+    compact = {k: v for k, v in record.items() if k != 'advisory'}
+    payload, feedback = AdvisoryStore.split(advisory)
+    compact['advisory_ref'] = get_advisory_store().put(payload)
+    if feedback and not compact.get('feedback'):
+        compact['feedback'] = feedback
+    return compact
+
+
+def resolve_record(record):
+    """A history record with its advisory loaded back from the advisory store."""
+    if 'advisory_ref' not in record:
+        return record
+    resolved = {k: v for k, v in record.items() if k != 'advisory_ref'}
+    advisory = get_advisory_store().get(record['advisory_ref']) or {}
+    if record.get('feedback'):
+        advisory['feedback'] = record['feedback']
+    resolved['advisory'] = advisory
+    return resolved
+
+
+def query_log_file(path):
+    """The query log next to a user's metadata file."""
+    return os.path.splitext(path)[0] + '.jsonl'
+
+
+_open_logs = weakref.WeakSet()
+
+
+class QueryLog:
+    """
+    Append-only JSON Lines file. Records are written and flushed one line at a time; fsync is
+    batched to once per FSYNC_INTERVAL. The last record is found by seeking back from the end,
+    and a line left incomplete by a crash is ignored (and trimmed before the next append).
+    on_sync(added, last_timestamp), if set, is called after a sync that follows new appends.
+    """
+
+    def __init__(self, path, on_sync=None):
+        self.path = path
+        self.on_sync = on_sync
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_sync = 0.0
+        self._sync_timer = None
+        self._added = 0
+        self._last_timestamp = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a+b')
+            self._file.seek(0, os.SEEK_END)
+            size = self._file.tell()
+            if size:
+                self._file.seek(size - 1)
+                if self._file.read(1) != b'\n':
+                    self._file.truncate(self._complete_size(self._file, size))
+            _open_logs.add(self)
+        return self._file
+
+    @staticmethod
+    def _complete_size(f, size, block=4096):
+        """Offset just past the last newline in the first `size` bytes (0 if there is none)."""
+        end = size
+        while end > 0:
+            start = max(0, end - block)
+            f.seek(start)
+            chunk = f.read(end - start)
+            i = chunk.rfind(b'\n')
+            if i >= 0:
+                return start + i + 1
+            end = start
+        return 0
+
+    def append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            f = self._open()
+            f.write(line)
+            f.flush()
+            self._added += 1
+            self._last_timestamp = record.get('timestamp', self._last_timestamp)
+            if time.monotonic() - self._last_sync >= FSYNC_INTERVAL:
+                self._sync()
+            if self._sync_timer is None:
+                self._sync_timer = threading.Timer(FSYNC_INTERVAL, self.sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+
+    def _sync(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        with self._lock:
+            self._sync_timer = None
+            self._sync()
+            added, self._added = self._added, 0
+            last_timestamp = self._last_timestamp
+        if added and self.on_sync:
+            try:
+                self.on_sync(added, last_timestamp)
+            except OSError as e:
+                print(f"Query log sync callback error: {e}")
+
+    def last(self, block=4096):
+        """The last complete record, read backwards from the end of the file (None if empty)."""
+        try:
+            with open(self.path, 'rb') as f:
+                size = self._complete_size(f, os.path.getsize(self.path), block)
+                if not size:
+                    return None
+                start = self._complete_size(f, size - 1, block)
+                f.seek(start)
+                return json.loads(f.read(size - start))
+        except (OSError, ValueError):
+            return None
+
+    def read_all(self):
+        records = []
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return records
+        for line in data[:data.rfind(b'\n') + 1].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+    def count(self):
+        """Number of complete records, counted without parsing them."""
+        try:
+            with open(self.path, 'rb') as f:
+                return f.read().count(b'\n')
+        except OSError:
+            return 0
+
+    def write_all(self, records):
+        """Replace the log's contents (used for migration and clearing)."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._added = 0
+            tmp_file = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                for record in records:
+                    f.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.path)
+
+
+@atexit.register
+def _sync_open_logs():
+    for log in list(_open_logs):
+        try:
+            log.sync()
+        except (OSError, ValueError):
+            pass
+
+
+class UserIndex:
+    """
+    {username: {'file', 'created_at', 'last_active', 'queries'}} for every user, kept in
+    users/index.json and rewritten under a file lock when a profile is saved (not per query, so
+    counts reflect the last save). The in-memory copy is re-read only when the file changes; a
+    missing index is rebuilt from the metadata files and query logs.
+    """
+
+    def __init__(self, users_dir=USERS_DIR):
+        self.users_dir = users_dir
+        self.path = os.path.join(users_dir, INDEX_FILE)
+        self.lock_path = os.path.join(users_dir, '.index.lock')
+        self._lock = threading.Lock()
+        self._entries = None
+        self._mtime = None
+
+    def _changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        return self._entries is None or mtime is None or mtime != self._mtime
+
+    def _load(self):
+        """Current entries; call with the locks held."""
+        if not self._changed():
+            return self._entries
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+            self._mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self._save(self.rebuild())
+        except (OSError, ValueError) as e:
+            print(f"User index unreadable, rebuilding: {e}")
+            self._save(self.rebuild())
+        return self._entries
+
+    def _save(self, entries):
+        write_json_atomic(self.path, entries)
+        self._entries = entries
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def rebuild(self):
+        """Entries built from the per-user metadata files and query logs."""
+        migrate_history(users_dir=self.users_dir)
+        entries = {}
+        for name in sorted(os.listdir(self.users_dir)):
+            if not name.endswith('.json') or name == INDEX_FILE:
+                continue
+            path = os.path.join(self.users_dir, name)
+            history = load_user_history(path)
+            if 'username' not in history:
+                continue
+            meta = history.get('meta', {})
+            last_active = meta.get('last_active')
+            if 'queries' in history:
+                count = len(history['queries'])
+            else:
+                count = QueryLog(query_log_file(path)).count()
+                record = QueryLog(query_log_file(path)).last()
+                if record and record.get('timestamp', '') > (last_active or ''):
+                    last_active = record['timestamp']
+            entries[history['username']] = {'file': name, 'created_at': meta.get('created_at'),
+                                            'last_active': last_active, 'queries': count}
+        return entries
+
+    def _update(self, username, change):
+        os.makedirs(self.users_dir, exist_ok=True)
+        with self._lock, file_lock(self.lock_path):
+            entries = dict(self._load())
+            entry = dict(entries.get(username) or {'file': os.path.basename(user_file(username, self.users_dir)),
+                                                   'created_at': None, 'last_active': None, 'queries': 0})
+            change(entry)
+            entries[username] = entry
+            self._save(entries)
+
+    def names(self):
+        with self._lock:
+            if not self._changed():
+                return list(self._entries)
+        os.makedirs(self.users_dir, exist_ok=True)
+        with self._lock, file_lock(self.lock_path):
+            return list(self._load())
+
+    def get(self, username):
+        """A user's index entry, or None."""
+        with self._lock:
+            if not self._changed():
+                return self._entries.get(username)
+        os.makedirs(self.users_dir, exist_ok=True)
+        with self._lock, file_lock(self.lock_path):
+            return self._load().get(username)
+
+    def __contains__(self, username):
+        return self.get(username) is not None
+
+    def record_queries(self, username, added, timestamp=None):
+        """Add queries appended to a user's log since the last update."""
+        def change(entry):
+            entry['queries'] += added
+            if timestamp and timestamp > (entry['last_active'] or ''):
+                entry['last_active'] = timestamp
+        self._update(username, change)
+
+    def touch(self, username, meta, queries=None):
+        """Record a user's metadata (and optionally a new query count)."""
+        def change(entry):
+            entry['created_at'] = meta.get('created_at', entry['created_at'])
+            entry['last_active'] = meta.get('last_active', entry['last_active'])
+            if queries is not None:
+                entry['queries'] = queries
+        self._update(username, change)
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_user_index():
+    """Process-wide user index."""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = UserIndex()
+        return _shared_index
 
 
 class UserProfile:
     def __init__(self, username):
         self.username = username
+        self.path = user_file(username)
+        self.log = QueryLog(query_log_file(self.path), on_sync=self._index_queries)
         self.history = self.load_history()
         self._init_metadata()
 
@@ -25,59 +420,64 @@ class UserProfile:
             }
         else:
             self.history['meta']['last_active'] = now
-        if 'queries' not in self.history:
-            self.history['queries'] = []
 
     def load_history(self):
-        if not os.path.exists(HISTORY_FILE):
-            return {}
-        try:
-            with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data.get(self.username, {})
-        except Exception:
-            return {}
+        """The user's metadata record; queries still stored inline (older files) move to the query log."""
+        migrate_history()
+        history = load_user_history(self.path)
+        history.pop('username', None)
+        if 'queries' in history:
+            queries = history.pop('queries')
+            if queries and not self.log.read_all():
+                self.log.write_all([compact_record(q) for q in queries])
+            history['advisory_refs'] = True
+        elif not history.get('advisory_refs'):
+            # Logs written before advisories were stored by reference are compacted once
+            records = self.log.read_all()
+            if any('advisory' in r for r in records):
+                self.log.write_all([compact_record(r) for r in records])
+            history['advisory_refs'] = True
+        else:
+            return history
+        self.history = history
+        self.save_history()
+        return history
+
+    def _index_queries(self, added, timestamp):
+        get_user_index().record_queries(self.username, added, timestamp)
 
     def save_history(self):
-        # Robust to file corruption and concurrent writes
-        try:
-            if os.path.exists(HISTORY_FILE):
-                with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            else:
-                data = {}
-        except Exception:
-            data = {}
-        data[self.username] = self.history
-        tmp_file = HISTORY_FILE + ".tmp"
-        with open(tmp_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        os.replace(tmp_file, HISTORY_FILE)
+        # Only this user's metadata record is written; the temp file + rename keeps it whole if interrupted
+        self.log.sync()
+        write_json_atomic(self.path, dict(self.history, username=self.username))
+        get_user_index().touch(self.username, self.get_metadata(), queries=self.log.count())
 
     def add_query(self, query, advisory):
-        self._init_metadata()
-        self.history['queries'].append({
+        self.log.append(compact_record({
             'query': query,
             'advisory': advisory,
             'timestamp': datetime.utcnow().isoformat()
-        })
-        self.save_history()
+        }))
 
     def get_last_advisory(self):
-        if 'queries' in self.history and self.history['queries']:
-            return self.history['queries'][-1]['advisory']
-        return None
+        record = self.log.last()
+        return resolve_record(record).get('advisory') if record else None
 
     def get_all_queries(self):
-        return self.history.get('queries', [])
+        return [resolve_record(r) for r in self.log.read_all()]
 
     def clear_history(self):
-        self.history['queries'] = []
+        self.log.write_all([])
         self._init_metadata()
         self.save_history()
 
     def get_metadata(self):
-        return self.history.get('meta', {})
+        """Metadata record; last_active also reflects the latest logged query."""
+        meta = dict(self.history.get('meta', {}))
+        record = self.log.last()
+        if record and record.get('timestamp', '') > meta.get('last_active', ''):
+            meta['last_active'] = record['timestamp']
+        return meta
 
 
 class UserManager:
@@ -86,11 +486,7 @@ class UserManager:
         self.current_user = None
 
     def load_users(self):
-        if not os.path.exists(HISTORY_FILE):
-            return []
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return list(data.keys())
+        return get_user_index().names()
 
     def switch_user(self, username):
         self.current_user = UserProfile(username)
@@ -103,7 +499,7 @@ class UserManager:
         return self.load_users()
 
     def add_user(self, username):
-        if username not in self.list_users():
+        if username not in get_user_index():
             user = UserProfile(username)
             user.save_history()
         return username
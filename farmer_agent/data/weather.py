@@ -1,27 +1,55 @@
 import os
 import json
+import threading
 import requests
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from farmer_agent.data.location import IPINFO_URL, get_location_resolver
+from farmer_agent.data.weather_cache import get_weather_cache, location_key
+from farmer_agent.data.weather_observation import WeatherObservation
+from farmer_agent.utils.env_loader import load_env_local
 
 # Paths for data files
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
-ENV_LOCAL_PATH = os.path.join(PROJECT_ROOT, 'env.local')
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 WEATHER_FILE = os.path.join(DATA_DIR, 'weather_patterns.json')
+# API base URLs; point them at a local stand-in (weather_stub.py) with OPENWEATHER_BASE_URL / IPINFO_URL
+OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5"
+
+# Bulk fetches: worker threads (and pooled connections)
+BULK_MAX_WORKERS = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Shared requests session with a connection pool sized for bulk weather fetches."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=BULK_MAX_WORKERS)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
 
-# Load environment variables
-if os.path.exists(ENV_LOCAL_PATH):
-    with open(ENV_LOCAL_PATH, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                key, value = line.split('=', 1)
-                os.environ[key] = value.strip()
 
 class WeatherEstimator:
-    def __init__(self, openweather_api_key=None):
-        """Initialize with OpenWeatherMap API key and load offline patterns."""
+    def __init__(self, openweather_api_key=None, cache_ttl=None, base_url=None, ipinfo_url=None, cache=None, forecast_store=None):
+        """Initialize with OpenWeatherMap API key and load offline patterns.
+        cache_ttl overrides the weather cache TTL (seconds) for this estimator.
+        base_url / ipinfo_url override the OpenWeatherMap and ipinfo endpoints (default: env, then the public APIs).
+        cache / forecast_store replace the shared weather cache and forecast store, e.g. throwaway ones for benchmarks."""
+        load_env_local()
         self.openweather_api_key = openweather_api_key or os.environ.get('OPENWEATHER_API_KEY')
+        self.base_url = (base_url or os.environ.get('OPENWEATHER_BASE_URL') or OPENWEATHER_URL).rstrip('/')
+        self.ipinfo_url = ipinfo_url or os.environ.get('IPINFO_URL') or IPINFO_URL
+        self.cache = cache or get_weather_cache()
+        self._forecast_store = forecast_store
+        self.cache_ttl = cache_ttl
+        self.locator = get_location_resolver()
         self.patterns = self.load_patterns()
         self.default = {
             "temperature": 30,
@@ -43,129 +71,285 @@ class WeatherEstimator:
         with open(WEATHER_FILE, 'r', encoding='utf-8') as f:
             return json.load(f)
 
-    def get_current_location(self):
-        """Get city name using IP geolocation (ipinfo.io)."""
+    def get_current_location(self, user=None):
+        """Get city name using the cached IP geolocation for this user or device (ipinfo.io)."""
+        place = self.locator.detect(user, ipinfo_url=self.ipinfo_url)
+        return place['name'] if place else None
+
+    def locate(self, location=None, user=None):
+        """
+        Return a location record (name, state, lat, lon) for a typed place name, a record
+        passed through as-is, or the detected location when location is None.
+        Unknown names come back as {'name': location} without coordinates.
+        """
+        if isinstance(location, dict):
+            return location
+        if location:
+            return self.locator.resolve(location) or {'name': location}
+        return self.locator.detect(user, ipinfo_url=self.ipinfo_url)
+
+    def _openweather_json(self, endpoint, params):
+        """GET an OpenWeatherMap endpoint over the pooled session; raises on HTTP/network errors."""
+        params = dict(params, appid=self.openweather_api_key, units='metric')
+        resp = get_http_session().get(f"{self.base_url}/{endpoint}", params=params, timeout=5)
+        resp.raise_for_status()
+        return resp.json()
+
+    @staticmethod
+    def _place_params(place):
+        if place.get('lat') is not None and place.get('lon') is not None:
+            return {'lat': place['lat'], 'lon': place['lon']}
+        return {'q': place['name']}
+
+    @staticmethod
+    def _cache_key(place):
+        if place.get('lat') is not None and place.get('lon') is not None:
+            return f"{place['lat']:.2f},{place['lon']:.2f}"
+        return location_key(place['name'])
+
+    def request_openweather(self, place):
+        """Call the OpenWeatherMap current-weather API for a location record and return the raw JSON, or None on error."""
         try:
-            resp = requests.get("https://ipinfo.io/json", timeout=5)
-            resp.raise_for_status()
-            return resp.json().get("city")
+            return self._openweather_json('weather', self._place_params(place))
         except Exception as e:
-            print(f"IP geolocation error: {e}")
+            print(f"OpenWeatherMap error: {e}")
             return None
 
     def fetch_openweather(self, location):
-        """Fetch current weather data from OpenWeatherMap and format output cleanly."""
+        """Fetch current weather (through the TTL cache) from OpenWeatherMap as a WeatherObservation.
+        location may be a place name or a record from locate(); known places are queried by coordinates."""
         if not self.openweather_api_key or not location:
             return None
+        place = self.locate(location)
+
+        def fetch():
+            data = self.request_openweather(place)
+            return WeatherObservation.from_openweather(data, place['name']).to_dict() if data else None
+
+        data = self.cache.get(self._cache_key(place), fetch, ttl=self.cache_ttl)
+        return WeatherObservation.from_dict(data) if data else None
+
+    @property
+    def forecasts(self):
+        """The forecast time-series store (NumPy is imported on first use)."""
+        if self._forecast_store is None:
+            from farmer_agent.data.forecast_store import get_forecast_store
+            self._forecast_store = get_forecast_store()
+        return self._forecast_store
+
+    def fetch_forecast(self, location, force=False):
+        """
+        The multi-day, 3-hourly forecast for a location as a ForecastSeries, refreshed through
+        the forecast store (only new or changed slots are merged). Returns the stored series
+        when offline or without an API key, or None if there is none.
+        """
+        if not location:
+            return None
+        place = self.locate(location)
+        key = self._cache_key(place)
+
+        def fetch(cnt):
+            from farmer_agent.data.forecast_store import ForecastSeries
+            params = self._place_params(place)
+            if cnt:
+                params['cnt'] = cnt
+            try:
+                return ForecastSeries.from_openweather(self._openweather_json('forecast', params))
+            except Exception as e:
+                print(f"OpenWeatherMap forecast error: {e}")
+                return None
+
+        if self.openweather_api_key:
+            series = self.forecasts.refresh(key, fetch, ttl=0 if force else None)
+        else:
+            series = self.forecasts.get(key)
+        return series if len(series) else None
+
+    def forecast_window(self, location, start=None, end=None):
+        """Forecast rows with start <= time < end (epoch seconds) as a dict of arrays, or None."""
+        series = self.fetch_forecast(location)
+        return series.window(start, end) if series else None
+
+    def forecast_days(self, location, days=5, start=None):
+        """Daily WeatherObservations for up to `days` forecast days from `start` (a date; default today)."""
+        import numpy as np
+        series = self.fetch_forecast(location)
+        if not series:
+            return []
+        name = self.locate(location)['name']
+        daily = series.daily()
+        first = int(np.searchsorted(daily['date'], np.datetime64(start or datetime.now().date(), 'D')))
+        return [WeatherObservation.from_forecast_day({k: v[i] for k, v in daily.items()}, name)
+                for i in range(first, min(first + days, len(daily['date'])))]
+
+    def _fetch_one(self, place):
+        """Fetch current weather for one place; returns (observation, error). Nothing is cached here."""
         try:
-            url = f"https://api.openweathermap.org/data/2.5/weather?q={location}&appid={self.openweather_api_key}&units=metric"
-            resp = requests.get(url, timeout=5)
-            resp.raise_for_status()
-            data = resp.json()
-            main = data.get('main', {})
-            wind = data.get('wind', {})
-            rain = data.get('rain', {})
-            weather_desc = data.get('weather', [{}])[0].get('description', '')
-            # Format output as clean text
-            output = (
-                f"Temperature: {main.get('temp', 'N/A')}°C\n"
-                f"Humidity: {main.get('humidity', 'N/A')}%\n"
-                f"Rainfall (last 1h): {rain.get('1h', 0)} mm\n"
-                f"Wind: {wind.get('speed', 'N/A')} m/s {wind.get('deg', '')}\n"
-                f"Condition: {weather_desc.capitalize()}\n"
-                f"Advice: Monitor local weather conditions."
-            )
-            return output
+            data = self._openweather_json('weather', self._place_params(place))
         except Exception as e:
-            print(f"OpenWeatherMap error: {e}")
-            return None
+            return None, str(e)
+        if not data:
+            return None, "No data returned"
+        return WeatherObservation.from_openweather(data, place['name']), None
+
+    def fetch_many(self, locations, max_workers=BULK_MAX_WORKERS):
+        """
+        Fetch current weather for many locations concurrently (e.g. a cooperative's villages).
+        Fresh cache entries are used as-is; the rest are fetched with bounded parallelism and
+        saved to the weather cache in one write once every fetch has finished. Returns one
+        dict per input location, in order: {'location', 'observation', 'error', 'cached'}.
+        A failed fetch keeps a stale observation (up to max_stale old) and reports the error;
+        places outside the gazetteer are queried by name, like fetch_openweather(), and empty
+        entries are reported as "Unknown location".
+        """
+        ttl = self.cache.ttl if self.cache_ttl is None else self.cache_ttl
+        places = [self.locate(loc) if loc else None for loc in locations]
+        results = [None] * len(places)
+        stale = {}
+        pending = []
+        duplicates = {}
+        first_by_key = {}
+        for i, place in enumerate(places):
+            if not place:
+                results[i] = {'location': locations[i], 'observation': None, 'error': "Unknown location", 'cached': False}
+                continue
+            key = self._cache_key(place)
+            if key in first_by_key:
+                duplicates[i] = first_by_key[key]
+                continue
+            first_by_key[key] = i
+            data, age = self.cache.peek(key)
+            if data is not None and age < ttl:
+                results[i] = {'location': place['name'], 'observation': WeatherObservation.from_dict(data), 'error': None, 'cached': True}
+            else:
+                stale[i] = WeatherObservation.from_dict(data) if data is not None and age < self.cache.max_stale else None
+                pending.append(i)
+        if pending and not self.openweather_api_key:
+            for i in pending:
+                results[i] = {'location': places[i]['name'], 'observation': stale[i], 'error': "No OpenWeatherMap API key", 'cached': stale[i] is not None}
+            pending = []
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(self._fetch_one, places[i]): i for i in pending}
+            for future in as_completed(futures):
+                i = futures[future]
+                observation, error = future.result()
+                if observation is None and stale[i] is not None:
+                    results[i] = {'location': places[i]['name'], 'observation': stale[i], 'error': error, 'cached': True}
+                else:
+                    results[i] = {'location': places[i]['name'], 'observation': observation, 'error': error, 'cached': False}
+                if observation is not None:
+                    fetched[self._cache_key(places[i])] = observation.to_dict()
+        self.cache.put_many(fetched)
+        for i, first in duplicates.items():
+            results[i] = dict(results[first], location=places[i]['name'])
+        return results
 
+    def generate_tips(self, weather_info, crop=None, model="phi3:mini", host="http://localhost:11434"):
+        """Ask the local LLM for farming tips for a weather description; raises on LLM/network errors."""
+        # Prepare prompt with weather data and optional crop
+        prompt = (
+            "You are an agricultural expert for farmers in India. Based on the following weather data, provide practical farming tips "
+            "focusing on irrigation, disease prevention, crop protection, and weather-related risks. "
+            "Keep the response concise, under 200 words, and formatted as a list with actionable advice."
+        )
+        if crop:
+            prompt += f"\nCrop: {crop}"
+        prompt += f"\nWeather Data: {weather_info}\nTips:"
+        # Call local phi3:mini via Ollama
+        url = f"{host}/api/generate"
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        response = requests.post(url, json=payload, timeout=60)
+        response.raise_for_status()
+        llm_response = response.json().get("response", "").strip()
+        # Remove asterisks, quotes, and extra symbols from LLM output
+        import re
+        clean_response = re.sub(r'["\*\[\]\{\}]', '', llm_response)
+        return re.sub(r'\s*\n\s*', '\n', clean_response).strip()
 
-    def get_llm_weather_tips(self, weather_data, crop=None, model="phi3:mini", host="http://localhost:11434"):
-        """Generate farming tips using local phi3:mini model based on weather data. Output clean text only."""
+    def get_llm_weather_tips(self, weather_data, crop=None, model="phi3:mini", host="http://localhost:11434", use_cache=True):
+        """Generate farming tips using local phi3:mini model based on weather data. Output clean text only.
+        Structured weather is reduced to a condition bucket and tips are shared through the tips cache."""
         if not weather_data:
             return "No weather data available for tips."
+        if isinstance(weather_data, dict):
+            weather_data = WeatherObservation.from_dict(weather_data)
         try:
-            # Prepare prompt with weather data and optional crop
-            prompt = (
-                "You are an agricultural expert for farmers in India. Based on the following weather data, provide practical farming tips "
-                "focusing on irrigation, disease prevention, crop protection, and weather-related risks. "
-                "Keep the response concise, under 200 words, and formatted as a list with actionable advice."
-            )
-            if crop:
-                prompt += f"\nCrop: {crop}"
-            # Use plain text for weather data
-            if isinstance(weather_data, str):
-                weather_info = weather_data
-            elif isinstance(weather_data, dict):
-                weather_info = '\n'.join([f"{k.capitalize()}: {v}" for k, v in weather_data.items() if k != 'warnings'])
-            else:
-                weather_info = str(weather_data)
-            prompt += f"\nWeather Data: {weather_info}\nTips:"
-            # Call local phi3:mini via Ollama
-            url = f"{host}/api/generate"
-            payload = {"model": model, "prompt": prompt, "stream": False}
-            response = requests.post(url, json=payload, timeout=60)
-            response.raise_for_status()
-            llm_response = response.json().get("response", "").strip()
-            # Remove asterisks, quotes, and extra symbols from LLM output
-            import re
-            clean_response = re.sub(r'["\*\[\]\{\}]', '', llm_response)
-            clean_response = re.sub(r'\s*\n\s*', '\n', clean_response)
-            return clean_response or "No tips generated."
+            if not isinstance(weather_data, WeatherObservation):
+                return self.generate_tips(str(weather_data), crop, model, host) or "No tips generated."
+            from farmer_agent.data.weather_tips import bucket_description, bucket_key, condition_bucket, get_tips_cache
+            bucket = condition_bucket(weather_data, crop)
+            cache = get_tips_cache() if use_cache else None
+            if cache:
+                cached = cache.get(bucket_key(bucket), model=model)
+                if cached is not None:
+                    return cached
+            tips = self.generate_tips(bucket_description(bucket), crop, model, host)
+            if cache and tips:
+                cache.put(bucket_key(bucket), tips, model=model)
+            return tips or "No tips generated."
         except Exception as e:
             return f"LLM error: {e}"
 
+    @staticmethod
+    def crop_advice(crop, season=None):
+        """Crop-specific advice to append to weather advice; season restricts it for offline patterns."""
+        if not crop:
+            return ""
+        crop = crop.lower()
+        if crop in ["rice", "paddy"] and season in (None, "monsoon"):
+            return "Rice grows well in monsoon, but ensure proper drainage." if season else "Rice grows well in wet conditions, but ensure proper drainage."
+        if crop in ["wheat"] and season in (None, "winter"):
+            return "Wheat is sensitive to frost; cover seedlings if needed."
+        if crop in ["tomato"] and season in (None, "summer"):
+            return "Provide shade to tomato plants during peak heat."
+        return ""
+
     def estimate(self, season=None, location=None, crop=None, date=None, use_online=True):
-        """Estimate weather for a given season, location, crop, or date."""
+        """Estimate weather for a given season, location, crop, or date as a WeatherObservation."""
         # Try online data first if enabled
         if use_online and self.openweather_api_key and location:
-            forecast = self.fetch_openweather(location)
-            if forecast:
-                # If forecast is a dict, copy and add crop advice; if string, just append advice
-                if isinstance(forecast, dict):
-                    pattern = forecast.copy()
-                    if crop:
-                        if crop.lower() in ["rice", "paddy"]:
-                            pattern["advice"] += " Rice grows well in wet conditions, but ensure proper drainage."
-                        elif crop.lower() in ["wheat"]:
-                            pattern["advice"] += " Wheat is sensitive to frost; cover seedlings if needed."
-                        elif crop.lower() in ["tomato"]:
-                            pattern["advice"] += " Provide shade to tomato plants during peak heat."
-                    return pattern
-                elif isinstance(forecast, str):
-                    advice = ""
-                    if crop:
-                        if crop.lower() in ["rice", "paddy"]:
-                            advice = " Rice grows well in wet conditions, but ensure proper drainage."
-                        elif crop.lower() in ["wheat"]:
-                            advice = " Wheat is sensitive to frost; cover seedlings if needed."
-                        elif crop.lower() in ["tomato"]:
-                            advice = " Provide shade to tomato plants during peak heat."
-                    return forecast + ("\n" + advice if advice else "")
-                else:
-                    return forecast
+            observation = self.fetch_openweather(location)
+            if observation:
+                return observation.with_advice(self.crop_advice(crop))
 
-        # Fallback to offline patterns
+        # Fallback to offline patterns, refined by gridded climate normals when the location is known
+        month = date.month if date else datetime.now().month
+        normals = None if season else self.climate_normals(location, month)
         if not season:
-            month = date.month if date else datetime.now().month
             season = "summer" if month in [3, 4, 5, 6] else "monsoon" if month in [7, 8, 9, 10] else "winter"
-        pattern = self.patterns.get(season, self.default.copy())
-        if crop:
-            pattern = pattern.copy()
-            if crop.lower() in ["rice", "paddy"] and season == "monsoon":
-                pattern["advice"] += " Rice grows well in monsoon, but ensure proper drainage."
-            elif crop.lower() in ["wheat"] and season == "winter":
-                pattern["advice"] += " Wheat is sensitive to frost; cover seedlings if needed."
-            elif crop.lower() in ["tomato"] and season == "summer":
-                pattern["advice"] += " Provide shade to tomato plants during peak heat."
-        if location:
-            pattern = pattern.copy()
-            pattern["advice"] += f" (Location: {location})"
-        return pattern
+        pattern = self.patterns.get(season, self.default)
+        observation = WeatherObservation.from_pattern(pattern, season, location)
+        if normals:
+            observation = replace(observation, source='normals', **normals)
+        return observation.with_advice(self.crop_advice(crop, season))
+
+    def climate_normals(self, location, month):
+        """
+        Monthly normals (temperature, humidity, rainfall) interpolated at a location's coordinates,
+        or None when the location has no coordinates or NumPy/the normals grid is unavailable.
+        """
+        if not location:
+            return None
+        place = location if isinstance(location, dict) else self.locator.resolve(location)
+        if not place or place.get('lat') is None or place.get('lon') is None:
+            return None
+        try:
+            from farmer_agent.data.climate_normals import get_climate_normals
+            values = get_climate_normals().monthly(place['lat'], place['lon'], month)
+        except (ImportError, OSError) as e:
+            print(f"Climate normals unavailable: {e}")
+            return None
+        return {name: round(float(value), 1) for name, value in values.items()}
 
     def daily_forecast(self, date=None, location=None):
-        """Return a daily forecast for a given date/location."""
+        """Return a daily forecast for a given date/location: the forecast for that day when it is
+        within the forecast horizon, otherwise the offline estimate."""
+        if location:
+            day = date.date() if isinstance(date, datetime) else date or datetime.now().date()
+            forecast = self.forecast_days(location, days=1, start=day)
+            if forecast and datetime.fromtimestamp(forecast[0].observed_at, tz=timezone.utc).date() == day:
+                return forecast[0]
         return self.estimate(date=date, location=location)
 
 if __name__ == "__main__":
@@ -176,7 +360,7 @@ if __name__ == "__main__":
         current_weather = estimator.fetch_openweather(location)
         if current_weather:
             print(f"Current Weather for {location}:")
-            print(json.dumps(current_weather, indent=2, ensure_ascii=False))
+            print(current_weather)
             print("\nFarming Tips:")
             print(estimator.get_llm_weather_tips(current_weather))
         else:
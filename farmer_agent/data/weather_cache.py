@@ -0,0 +1,120 @@
+# Weather Cache (Offline-first)
+# Persistent per-location cache of weather observations with a TTL and stale-while-revalidate refresh
+import json
+import os
+import threading
+import time
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+WEATHER_CACHE_FILE = os.path.join(DATA_DIR, 'weather_cache.json')
+
+# Seconds a cached observation is served without refreshing (override with WEATHER_CACHE_TTL)
+DEFAULT_TTL = 1800
+# Seconds after which a stale observation is no longer served while refreshes keep failing
+# (override with WEATHER_CACHE_MAX_STALE)
+DEFAULT_MAX_STALE = 6 * 3600
+
+
+def location_key(location):
+    """Normalize a location name into a cache key."""
+    return ' '.join(str(location).lower().split())
+
+
+class WeatherCache:
+    def __init__(self, path=WEATHER_CACHE_FILE, ttl=None, max_stale=None):
+        self.path = path
+        self.ttl = ttl if ttl is not None else int(os.environ.get('WEATHER_CACHE_TTL', DEFAULT_TTL))
+        self.max_stale = max_stale if max_stale is not None else int(os.environ.get('WEATHER_CACHE_MAX_STALE', DEFAULT_MAX_STALE))
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.entries = self.load_cache()
+
+    def load_cache(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self):
+        with self._lock:
+            data = dict(self.entries)
+        tmp_file = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.path)
+        except OSError as e:
+            print(f"Weather cache save error: {e}")
+
+    def peek(self, key):
+        """Return (data, age_seconds) for a cached entry, or (None, None)."""
+        entry = self.entries.get(key)
+        if not entry:
+            return None, None
+        return entry['data'], time.time() - entry['fetched_at']
+
+    def put(self, key, data):
+        self.put_many({key: data})
+
+    def put_many(self, items):
+        """Store several {key: data} entries with a single write of the cache file."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for key, data in items.items():
+                self.entries[key] = {'fetched_at': now, 'data': data}
+        self.save_cache()
+
+    def get(self, key, fetch, ttl=None):
+        """
+        Return cached data for key, calling fetch() only when needed.
+        Fresh entries are returned as-is; stale entries are returned immediately while a
+        background thread refreshes them; missing entries, and entries older than max_stale,
+        are fetched synchronously (None if that fails, rather than the outdated entry).
+        fetch() returns the new data or None on failure.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        data, age = self.peek(key)
+        if data is not None and age < self.max_stale:
+            if age >= ttl:
+                self.refresh_async(key, fetch)
+            return data
+        data = fetch()
+        if data is not None:
+            self.put(key, data)
+        return data
+
+    def refresh_async(self, key, fetch):
+        """Refresh one key in a daemon thread; concurrent refreshes of the same key are merged."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def worker():
+            try:
+                data = fetch()
+                if data is not None:
+                    self.put(key, data)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_weather_cache():
+    """Process-wide weather cache shared by every WeatherEstimator."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = WeatherCache()
+        return _shared_cache
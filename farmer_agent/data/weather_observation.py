@@ -0,0 +1,144 @@
+# Weather Observation Record
+# Compact, typed weather record shared by the live fetch, cache and offline-pattern paths.
+# Numbers stay numbers; text is produced only when a record is displayed.
+import time
+from dataclasses import asdict, dataclass, field, fields, replace
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class WeatherObservation:
+    temperature: Optional[float] = None   # °C
+    humidity: Optional[float] = None      # %
+    rainfall: Optional[float] = None      # mm (last hour for live data, day total for forecasts, seasonal for patterns)
+    wind_speed: Optional[float] = None    # m/s
+    wind_deg: Optional[float] = None
+    wind: str = ''                        # short description, e.g. "Gusty" or "3.1 m/s 240"
+    condition: str = ''
+    location: Optional[str] = None
+    source: str = ''                      # 'openweather', 'forecast', 'normals' or 'pattern'
+    observed_at: Optional[float] = None   # epoch seconds
+    advice: str = ''
+    warnings: Tuple[str, ...] = field(default_factory=tuple)
+
+    @classmethod
+    def from_openweather(cls, data, location=None):
+        """Build a record from an OpenWeatherMap current-weather response."""
+        main = data.get('main', {})
+        wind = data.get('wind', {})
+        rain = data.get('rain', {})
+        speed = wind.get('speed')
+        deg = wind.get('deg')
+        return cls(
+            temperature=main.get('temp'),
+            humidity=main.get('humidity'),
+            rainfall=rain.get('1h', 0),
+            wind_speed=speed,
+            wind_deg=deg,
+            wind=f"{speed} m/s {deg if deg is not None else ''}".strip() if speed is not None else '',
+            condition=(data.get('weather') or [{}])[0].get('description', ''),
+            location=location or data.get('name'),
+            source='openweather',
+            observed_at=data.get('dt') or time.time(),
+            advice="Monitor local weather conditions."
+        )
+
+    @classmethod
+    def from_forecast_day(cls, day, location=None):
+        """Build a record from one day of ForecastSeries.daily() (values for a single date)."""
+        def number(name):
+            value = float(day[name])
+            return None if value != value else round(value, 1)
+        speed = number('wind_speed')
+        pop = number('pop')
+        warnings = (f"Rain likely ({pop * 100:.0f}% chance)",) if pop is not None and pop >= 0.6 else ()
+        return cls(
+            temperature=number('temperature'),
+            humidity=number('humidity'),
+            rainfall=number('rainfall'),
+            wind_speed=speed,
+            wind=f"{speed} m/s" if speed is not None else '',
+            condition=f"forecast for {day['date']} ({number('temp_min')}-{number('temp_max')}°C)",
+            location=location,
+            source='forecast',
+            observed_at=float(day['date'].astype('datetime64[s]').astype('int64')),
+            advice="Plan field work around the forecast.",
+            warnings=warnings
+        )
+
+    @classmethod
+    def from_pattern(cls, pattern, season=None, location=None):
+        """Build a record from an offline seasonal pattern dict."""
+        return cls(
+            temperature=pattern.get('temperature'),
+            humidity=pattern.get('humidity'),
+            rainfall=pattern.get('rainfall'),
+            wind=pattern.get('wind', ''),
+            condition=season or '',
+            location=location,
+            source='pattern',
+            advice=pattern.get('advice', ''),
+            warnings=tuple(pattern.get('warnings', []))
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a record from to_dict() output (e.g. the weather cache)."""
+        if 'main' in data:
+            # Raw API response cached before records existed
+            return cls.from_openweather(data)
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in data.items() if k in known}
+        values['warnings'] = tuple(values.get('warnings', ()))
+        return cls(**values)
+
+    def to_dict(self):
+        data = asdict(self)
+        data['warnings'] = list(self.warnings)
+        return data
+
+    def get(self, key, default=None):
+        """Dict-style access for callers that treated weather as a dict."""
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def with_advice(self, extra):
+        """Return a copy with extra advice appended."""
+        if not extra:
+            return self
+        return replace(self, advice=f"{self.advice} {extra}".strip())
+
+    def format(self):
+        """Human-readable multi-line text for display and LLM prompts."""
+        def show(value):
+            return 'N/A' if value is None else value
+        rain_label = {'openweather': "Rainfall (last 1h)", 'forecast': "Rainfall (day total)"}.get(self.source, "Rainfall")
+        lines = [
+            f"Temperature: {show(self.temperature)}°C",
+            f"Humidity: {show(self.humidity)}%",
+            f"{rain_label}: {show(self.rainfall)} mm",
+            f"Wind: {self.wind or 'N/A'}",
+        ]
+        if self.condition:
+            lines.append(f"Condition: {self.condition[:1].upper()}{self.condition[1:]}")
+        if self.location:
+            lines.append(f"Location: {self.location}")
+        lines.append(f"Advice: {self.advice or 'N/A'}")
+        if self.warnings:
+            lines.append("Warnings: " + "; ".join(self.warnings))
+        return "\n".join(lines)
+
+    def summary(self):
+        """One-line text, e.g. for a row of a multi-day forecast."""
+        parts = [f"{self.condition[:1].upper()}{self.condition[1:]}" if self.condition else (self.location or 'Weather')]
+        if self.temperature is not None:
+            parts.append(f"{self.temperature}°C")
+        if self.humidity is not None:
+            parts.append(f"humidity {self.humidity}%")
+        if self.rainfall is not None:
+            parts.append(f"rain {self.rainfall} mm")
+        parts.extend(self.warnings)
+        return ", ".join(parts)
+
+    def __str__(self):
+        return self.format()
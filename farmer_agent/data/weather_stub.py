@@ -0,0 +1,255 @@
+# Local OpenWeatherMap / ipinfo Stand-in
+# Replays recorded API responses (weather_fixtures.json) over HTTP with configurable latency,
+# error rate and rate limiting, so caching, concurrency and fallback behavior can be measured
+# deterministically with no network. Point WeatherEstimator at it with base_url/ipinfo_url
+# (or the OPENWEATHER_BASE_URL / IPINFO_URL environment variables).
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+FIXTURES_FILE = os.path.join(DATA_DIR, 'weather_fixtures.json')
+
+OPENWEATHER_PREFIX = '/data/2.5'
+FORECAST_STEP = 3 * 3600
+IPINFO_PATH = '/ipinfo/json'
+
+
+def load_fixtures(path=FIXTURES_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class WeatherStubServer:
+    """
+    Threaded HTTP server replaying fixtures. Use as a context manager or start()/stop().
+    latency: seconds added to every response, plus uniform jitter in [0, jitter).
+    error_rate: fraction of requests answered with HTTP 500.
+    rate_limit: requests allowed per rate_window seconds before answering 429 (None: unlimited).
+    seed makes latency jitter and injected errors reproducible.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, fixtures=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate_limit=None, rate_window=60.0, seed=0):
+        self.fixtures = fixtures or load_fixtures()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._by_name = {}
+        self._by_id = {}
+        for record in self.fixtures['openweather']['weather']:
+            self._by_name[record['name'].lower()] = record
+            self._by_id[record['id']] = record
+        self._forecasts = {f['city']['name'].lower(): f for f in self.fixtures['openweather'].get('forecast', [])}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openweather_url(self):
+        return self.base_url + OPENWEATHER_PREFIX
+
+    @property
+    def ipinfo_url(self):
+        return self.base_url + IPINFO_PATH
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+            self._recent.clear()
+
+    def _admit(self):
+        """Draw this request's delay and injected failure; returns (delay, status or None)."""
+        with self._lock:
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0.0)
+            now = time.monotonic()
+            if self.rate_limit is not None:
+                while self._recent and now - self._recent[0] >= self.rate_window:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    return delay, 429
+                self._recent.append(now)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return delay, 500
+            return delay, None
+
+    @staticmethod
+    def _closest(records, lat, lon, coord=lambda r: r['coord']):
+        def distance(record):
+            c = coord(record)
+            return math.hypot(c['lat'] - lat, (c['lon'] - lon) * math.cos(math.radians(lat)))
+        return min(records, key=distance)
+
+    def _nearest(self, lat, lon):
+        """The recorded station nearest to a point, relabelled with the requested coordinates."""
+        record = self._closest(self._by_id.values(), lat, lon)
+        return dict(record, coord={'lon': lon, 'lat': lat})
+
+    def _forecast(self, params):
+        """
+        The recorded forecast for a city name (or the nearest one to lat/lon), with timestamps
+        shifted to start at the next 3-hour slot so replays always look current.
+        """
+        if not self._forecasts:
+            return 404, {'cod': '404', 'message': 'city not found'}
+        if 'q' in params:
+            recorded = self._forecasts.get(params['q'].split(',')[0].strip().lower())
+            if recorded is None:
+                return 404, {'cod': '404', 'message': 'city not found'}
+        else:
+            try:
+                lat, lon = float(params['lat']), float(params['lon'])
+            except (KeyError, ValueError):
+                return 400, {'cod': '400', 'message': 'Nothing to geocode'}
+            recorded = self._closest(self._forecasts.values(), lat, lon, coord=lambda f: f['city']['coord'])
+        rows = recorded['list']
+        if params.get('cnt'):
+            rows = rows[:max(int(params['cnt']), 1)]
+        shift = (int(time.time()) // FORECAST_STEP + 1) * FORECAST_STEP - rows[0]['dt']
+        shifted = []
+        for row in rows:
+            dt = row['dt'] + shift
+            shifted.append(dict(row, dt=dt, dt_txt=time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(dt))))
+        return 200, dict(recorded, cnt=len(shifted), list=shifted)
+
+    def _weather(self, params):
+        if 'q' in params:
+            name = params['q'].split(',')[0].strip().lower()
+            record = self._by_name.get(name)
+            if record is None:
+                return 404, {'cod': '404', 'message': 'city not found'}
+            return 200, record
+        try:
+            return 200, self._nearest(float(params['lat']), float(params['lon']))
+        except (KeyError, ValueError):
+            return 400, {'cod': '400', 'message': 'Nothing to geocode'}
+
+    def respond(self, path, params):
+        """Status and JSON body for a request path and its (single-valued) query parameters."""
+        if path == IPINFO_PATH:
+            return 200, self.fixtures['ipinfo']
+        if not path.startswith(OPENWEATHER_PREFIX + '/'):
+            return 404, {'cod': '404', 'message': 'Internal error'}
+        if not params.get('appid'):
+            return 401, {'cod': 401, 'message': 'Invalid API key. Please see https://openweathermap.org/faq#error401 for more info.'}
+        endpoint = path[len(OPENWEATHER_PREFIX) + 1:]
+        if endpoint == 'weather':
+            return self._weather(params)
+        if endpoint == 'forecast':
+            return self._forecast(params)
+        return 404, {'cod': '404', 'message': 'Internal error'}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                delay, failure = server._admit()
+                if delay:
+                    time.sleep(delay)
+                if failure == 429:
+                    status, body = 429, {'cod': 429, 'message': 'Your account is temporarily blocked due to exceeding of requests limitation of your subscription type.'}
+                elif failure == 500:
+                    status, body = 500, {'cod': '500', 'message': 'Internal error'}
+                else:
+                    status, body = server.respond(url.path, params)
+                with server._lock:
+                    server.stats['requests'] += 1
+                    server.stats[url.path] += 1
+                    server.stats[status] += 1
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                if status == 429:
+                    self.send_header('Retry-After', str(int(server.rate_window)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def demo(server):
+    """Fetch every gazetteer place twice through the stub: cold (concurrent) then warm (cached)."""
+    import tempfile
+    from farmer_agent.data.location import get_location_resolver
+    from farmer_agent.data.weather import WeatherEstimator
+    from farmer_agent.data.weather_cache import WeatherCache
+
+    places = get_location_resolver().gazetteer.places
+    with tempfile.TemporaryDirectory() as tmp:
+        estimator = WeatherEstimator(openweather_api_key='stub', base_url=server.openweather_url,
+                                     ipinfo_url=server.ipinfo_url, cache=WeatherCache(os.path.join(tmp, 'weather_cache.json')))
+        for label in ('cold', 'warm'):
+            server.reset_stats()
+            start = time.perf_counter()
+            results = estimator.fetch_many(places)
+            elapsed = time.perf_counter() - start
+            errors = sum(1 for r in results if r['error'])
+            print(f"{label}: {len(results)} places in {elapsed:.2f}s, {server.stats['requests']} requests, {errors} errors")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Local OpenWeatherMap/ipinfo stand-in replaying recorded responses")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--rate-limit', type=int, default=None, help='Requests per window before HTTP 429')
+    parser.add_argument('--rate-window', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--demo', action='store_true', help='Run a cold/warm bulk fetch against the stub and exit')
+    args = parser.parse_args()
+    stub = WeatherStubServer(port=args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                             rate_limit=args.rate_limit, rate_window=args.rate_window, seed=args.seed)
+    with stub:
+        if args.demo:
+            demo(stub)
+        else:
+            print(f"OPENWEATHER_BASE_URL={stub.openweather_url}")
+            print(f"IPINFO_URL={stub.ipinfo_url}")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,125 @@
+# Condition-Bucketed Weather Tips
+# Weather is reduced to a small set of condition buckets (temperature band, humidity band, rain,
+# wind class, optional crop) so LLM farming tips can be cached and shared across users and places.
+import json
+import os
+import threading
+import time
+from itertools import product
+
+from farmer_agent.data.answer_cache import AnswerCache
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'config')
+TIPS_CACHE_FILE = os.path.join(DATA_DIR, 'weather_tips_cache.json')
+CROPS_FILE = os.path.join(CONFIG_DIR, 'crops.json')
+
+# (upper bound, label) pairs; a value falls in the first band whose bound it is below
+TEMPERATURE_BANDS = [(10, 'cold (below 10°C)'), (20, 'cool (10-20°C)'), (30, 'warm (20-30°C)'),
+                     (38, 'hot (30-38°C)'), (float('inf'), 'extreme heat (38°C and above)')]
+HUMIDITY_BANDS = [(40, 'dry (below 40%)'), (70, 'moderate (40-70%)'), (float('inf'), 'humid (70% and above)')]
+WIND_CLASSES = [(2, 'calm'), (6, 'breezy'), (float('inf'), 'windy')]
+RAIN_STATES = ['no rain', 'rain']
+
+# Rainfall that counts as "rain": live data is mm in the last hour, forecasts mm per day,
+# seasonal/normals data is mm per month
+RAIN_THRESHOLDS = {'openweather': 0.1, 'forecast': 1.0}
+SEASONAL_RAIN_THRESHOLD = 50
+WINDY_WORDS = ('gust', 'storm', 'cyclone', 'strong')
+ANY_CROP = 'any crop'
+
+
+def _band(value, bands, default_index):
+    if value is None:
+        return bands[default_index][1]
+    return next(label for bound, label in bands if value < bound)
+
+
+def condition_bucket(observation, crop=None):
+    """Reduce a WeatherObservation to its bucket tuple (temperature, humidity, rain, wind, crop)."""
+    threshold = RAIN_THRESHOLDS.get(observation.source, SEASONAL_RAIN_THRESHOLD)
+    rainy = (observation.rainfall or 0) >= threshold or 'rain' in (observation.condition or '').lower()
+    if observation.wind_speed is not None:
+        wind = _band(observation.wind_speed, WIND_CLASSES, 0)
+    else:
+        wind = 'windy' if any(w in (observation.wind or '').lower() for w in WINDY_WORDS) else 'calm'
+    return (
+        _band(observation.temperature, TEMPERATURE_BANDS, 2),
+        _band(observation.humidity, HUMIDITY_BANDS, 1),
+        RAIN_STATES[rainy],
+        wind,
+        crop.strip().lower() if crop else ANY_CROP,
+    )
+
+
+def bucket_key(bucket):
+    return '|'.join(bucket)
+
+
+def bucket_description(bucket):
+    """Weather text for the LLM prompt, describing the bucket rather than exact readings."""
+    temperature, humidity, rain, wind, _ = bucket
+    return f"Temperature: {temperature}\nHumidity: {humidity}\nRain: {rain}\nWind: {wind}"
+
+
+def all_buckets(crops=None):
+    """Every bucket for the given crops (default: all crops in crops.json), plus the crop-less ones."""
+    if crops is None:
+        with open(CROPS_FILE, 'r', encoding='utf-8') as f:
+            crops = list(json.load(f))
+    crop_keys = [ANY_CROP] + [c.lower() for c in crops]
+    return list(product(
+        [label for _, label in TEMPERATURE_BANDS],
+        [label for _, label in HUMIDITY_BANDS],
+        RAIN_STATES,
+        [label for _, label in WIND_CLASSES],
+        crop_keys,
+    ))
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_tips_cache():
+    """Process-wide cache of tips per bucket (hit/miss stats are kept separately from FAQ answers)."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = AnswerCache(TIPS_CACHE_FILE)
+        return _shared_cache
+
+
+def precompute_tips(estimator, crops=None, time_budget=3600, model="phi3:mini", host="http://localhost:11434"):
+    """
+    Fill the tips cache for every bucket not yet cached, until done or out of time.
+    Returns (generated, remaining).
+    """
+    cache = get_tips_cache()
+    deadline = time.monotonic() + time_budget
+    pending = [b for b in all_buckets(crops) if not cache.contains(bucket_key(b), model=model)]
+    generated = 0
+    for bucket in pending:
+        if time.monotonic() >= deadline:
+            break
+        crop = None if bucket[4] == ANY_CROP else bucket[4]
+        try:
+            tips = estimator.generate_tips(bucket_description(bucket), crop, model=model, host=host)
+        except Exception as e:
+            print(f"Tips generation failed for {bucket_key(bucket)}: {e}")
+            continue
+        if not tips:
+            print(f"No tips generated for {bucket_key(bucket)}")
+            continue
+        cache.put(bucket_key(bucket), tips, model=model, source='precompute', save=False)
+        generated += 1
+        if generated % 10 == 0:
+            cache.save_cache()
+    cache.save_cache()
+    return generated, len(pending) - generated
+
+
+if __name__ == "__main__":
+    from farmer_agent.data.weather import WeatherEstimator
+    print("Distinct buckets:", len(all_buckets()))
+    print("Generated, remaining:", precompute_tips(WeatherEstimator()))
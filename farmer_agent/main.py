@@ -23,15 +23,18 @@ import sys
 import os
 from farmer_agent.utils.env_loader import load_env_local
 import json
+from datetime import datetime, timedelta
 from farmer_agent.advisory.advisor import get_crop_advice
-from farmer_agent.nlp.stt import recognize_speech
-from farmer_agent.nlp.tts import speak, list_voices
-from farmer_agent.nlp.translate import OfflineTranslator
-from farmer_agent.nlp.cv import PlantIdentifier
+from farmer_agent.utils.lazy_import import lazy_import
+# Speech, translation and vision load their model libraries on first use
+recognize_speech = lazy_import('farmer_agent.nlp.stt', 'recognize_speech', requires=('whisper',))
+speak, list_voices = lazy_import('farmer_agent.nlp.tts', 'speak', 'list_voices', requires=('pyttsx3',))
+OfflineTranslator = lazy_import('farmer_agent.nlp.translate', 'OfflineTranslator', requires=('transformers',))
+PlantIdentifier = lazy_import('farmer_agent.nlp.cv', 'PlantIdentifier', requires=('inference_sdk',))
 from farmer_agent.utils.file_utils import load_json
 from farmer_agent.data.user_profile import UserManager
-from farmer_agent.data.crop_calendar import CropCalendar, Reminders
-from farmer_agent.data.faq import FAQ
+from farmer_agent.data.calendar_service import get_calendar_service
+from farmer_agent.data.faq import FAQ, query_language
 from farmer_agent.data.weather import WeatherEstimator
 from farmer_agent.data.analytics import Analytics
 from farmer_agent.utils.accessibility import Accessibility
@@ -119,11 +122,16 @@ def main():
                 advice['feedback'] = feedback_val
             user.add_query(f"{crop}, {soil}", advice)
         elif choice == "3":
-            calendar = CropCalendar()
+            calendar = get_calendar_service()
             print(acc.format_text("Crop Calendar:"))
             crop = input("Enter crop name: ")
-            print(json.dumps(calendar.get_schedule(crop), indent=2, ensure_ascii=False))
-            reminders = Reminders()
+            today = datetime.now()
+            sowing = input("Sowing date (YYYY-MM-DD, blank for today): ").strip() or today.strftime('%Y-%m-%d')
+            print(json.dumps(calendar.get_schedule(crop, sowing), indent=2, ensure_ascii=False))
+            week = calendar.activities_between(today.strftime('%Y-%m-%d'), (today + timedelta(days=7)).strftime('%Y-%m-%d'))
+            print(acc.format_text("Due this week (all crops):"))
+            print(json.dumps(week, indent=2, ensure_ascii=False))
+            reminders = calendar.reminders
             print(acc.format_text("Reminders:"))
             print(json.dumps(reminders.get_upcoming(), indent=2, ensure_ascii=False))
             if input("Add reminder? (y/n): ").lower() == 'y':
@@ -133,7 +141,7 @@ def main():
         elif choice == "4":
             query = input("Enter your FAQ question: ")
             faq = FAQ()
-            results = faq.search(query, use_llm=True)
+            results = faq.search(query, use_llm=True, lang=query_language(query))
             if results:
                 answer = results[0].get('answer', '')
                 print(f"LLM FAQ Response:\n{answer}")
@@ -142,13 +150,19 @@ def main():
                 print("No response from LLM.")
         elif choice == "5":
             estimator = WeatherEstimator(openweather_api_key=openweather_api_key)
-            location = estimator.get_current_location()
+            place = estimator.locate()
+            location = place['name'] if place else None
             if location:
                 print(acc.format_text(f"Detected location: {location}"))
-                current_weather = estimator.fetch_openweather(location)
+                current_weather = estimator.fetch_openweather(place)
                 if current_weather:
                     print(acc.format_text(f"Current Weather for {location}:"))
                     print(current_weather)
+                    days = estimator.forecast_days(place)
+                    if days:
+                        print(acc.format_text(f"{len(days)}-Day Forecast:"))
+                        for day in days:
+                            print(day.summary())
                     tips = estimator.get_llm_weather_tips(current_weather)
                     print(acc.format_text("\nFarming Tips:"))
                     print(tips)
@@ -176,6 +190,7 @@ def main():
             else:
                 print(acc.format_text(f"Translation: {translated}"))
         elif choice == "9":
+            get_calendar_service().flush()
             print(acc.format_text("Goodbye!"))
             break
         else:
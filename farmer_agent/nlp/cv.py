@@ -1,7 +1,8 @@
 
 
 # PlantIdentifier class for agentic/LLM integration
-from inference_sdk import InferenceHTTPClient
+# inference_sdk is imported when an identifier is created, not at import time.
+from farmer_agent.utils.lazy_import import require
 
 class PlantIdentifier:
     def get_llm_disease_tips(self, disease_summary, model="phi3:mini", host="http://localhost:11434"):
@@ -33,6 +34,7 @@ class PlantIdentifier:
         except Exception as e:
             return f"[LLM error: {e}]"
     def __init__(self, api_key=None):
+        InferenceHTTPClient = require('inference_sdk', 'pip install inference-sdk').InferenceHTTPClient
         self.client = InferenceHTTPClient(
             api_url="https://serverless.roboflow.com",
             api_key=api_key or "HAISJzXtj7t48iPVJhQG"
@@ -4,16 +4,8 @@
 # Supported languages: Hindi (hi), Tamil (ta), Telugu (te), Kannada (kn), Malayalam (ml), English (en), and more.
 # Example usage: translator.translate(text, src_lang, tgt_lang)
 
-import sys
-try:
-    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-except ImportError:
-    print("Please install transformers: pip install transformers")
-    sys.exit(1)
-try:
-    from indictrans import IndicProcessor # type: ignore
-except ImportError:
-    IndicProcessor = None
+# transformers (and torch) are imported when a model is first loaded, not at import time.
+from farmer_agent.utils.lazy_import import is_available, require
 
 
 # Use MarianMT for Hindi and Malayalam, IndicTrans2 for Tamil, Telugu, Kannada, Malayalam
@@ -46,16 +38,19 @@ class OfflineTranslator:
         self.model_name = model_name or DEFAULT_MODEL
         self.tokenizer = None
         self.model = None
-        self.processor = IndicProcessor(inference=True) if IndicProcessor else None
+        self.processor = None
         self._load_model(self.model_name)
 
     def _load_model(self, model_name):
         try:
+            transformers = require('transformers')
             trust_remote = False
             if model_name == INDICTRANS2_MODEL:
                 trust_remote = True
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=trust_remote)
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name, trust_remote_code=trust_remote)
+                if self.processor is None and is_available('indictrans'):
+                    self.processor = require('indictrans').IndicProcessor(inference=True)
+            self.tokenizer = transformers.AutoTokenizer.from_pretrained(model_name, trust_remote_code=trust_remote)
+            self.model = transformers.AutoModelForSeq2SeqLM.from_pretrained(model_name, trust_remote_code=trust_remote)
             self.model_name = model_name
         except Exception as e:
             print(f"[Error] Could not load model '{model_name}': {e}")
@@ -1,13 +1,14 @@
 # Offline Text-to-Speech for Regional Indian Languages
 # To expand language support, install additional Indian voices in Windows settings.
 # Use pyttsx3 to list and select voices for Hindi, Tamil, Telugu, Bengali, etc.
-import pyttsx3
+# pyttsx3 is imported on first use, so importing this module does not load the speech engine.
+from farmer_agent.utils.lazy_import import require
 
 def speak(text, lang_voice=None):
     """
     Speak the given text using offline TTS. Optionally set a voice for Indian languages.
     """
-    engine = pyttsx3.init()
+    engine = require('pyttsx3').init()
     voices = engine.getProperty('voices')
     if lang_voice:
         # Try to set the voice by name or language code
@@ -35,7 +36,7 @@ def list_voices():
     """
     List all available voices on the system. To add more Indian languages, install them in Windows language settings.
     """
-    engine = pyttsx3.init()
+    engine = require('pyttsx3').init()
     voices = engine.getProperty('voices')
     # Robustly handle voices property
     if isinstance(voices, (list, tuple)):
@@ -1,7 +1,14 @@
 import os
 
-def load_env_local():
-    """Load environment variables from env.local at project root."""
+_loaded = False
+
+
+def load_env_local(force=False):
+    """Load environment variables from env.local at project root (once per process unless force=True)."""
+    global _loaded
+    if _loaded and not force:
+        return
+    _loaded = True
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     env_path = os.path.join(base_dir, 'env.local')
     if os.path.exists(env_path):
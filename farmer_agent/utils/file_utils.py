@@ -1,6 +1,7 @@
 # Utility functions for file and data handling (offline)
 import json
 import os
+from contextlib import contextmanager
 
 def load_json(file_path):
     """
@@ -24,3 +25,27 @@ def validate_json(data, required_keys):
     """
     missing = [key for key in required_keys if key not in data]
     return missing
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock on path (created if missing) for the with-block. The lock is advisory
+    and works across processes as well as across threads holding separate locks on one file.
+    """
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
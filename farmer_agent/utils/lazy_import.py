@@ -0,0 +1,123 @@
+# Lazy Imports
+# Heavy optional dependencies (transformers/torch, whisper, pyttsx3, inference_sdk) are imported
+# on first use of the feature that needs them, so starting the agent for the calendar or weather
+# does not wait on model libraries.
+import importlib
+import importlib.util
+import json
+import subprocess
+import sys
+import threading
+
+# Modules that must not be imported just by starting the agent
+HEAVY_MODULES = ('torch', 'transformers', 'whisper', 'pyttsx3', 'inference_sdk', 'indictrans')
+# Entry points checked by the import budget, and the wall-clock budget for each (seconds)
+STARTUP_MODULES = ('farmer_agent.main', 'farmer_agent.data.crop_calendar', 'farmer_agent.data.weather')
+IMPORT_BUDGET = 1.0
+
+_import_lock = threading.Lock()
+
+
+def is_available(module_name):
+    """True if module_name can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def require(module_name, install_hint=None):
+    """Import and return a dependency, raising ImportError with an install hint if it is missing."""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        hint = install_hint or f"pip install {module_name.split('.')[0]}"
+        raise ImportError(f"'{module_name}' is required for this feature. Install it with: {hint}") from e
+
+
+class LazyAttribute:
+    """
+    Stand-in for `from module import name`: the module is imported the first time the object
+    is called or one of its attributes is used. Truthiness reports whether the module and the
+    dependencies listed in `requires` are installed, without importing them, so callers can
+    keep checks like `if speak:`.
+    """
+
+    def __init__(self, module_name, name, requires=()):
+        self._module_name = module_name
+        self._name = name
+        self._requires = tuple(requires)
+        self._target = None
+
+    def resolve(self):
+        if self._target is None:
+            with _import_lock:
+                if self._target is None:
+                    module = importlib.import_module(self._module_name)
+                    self._target = getattr(module, self._name)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __bool__(self):
+        if self._target is not None:
+            return True
+        return all(is_available(m) for m in (self._module_name,) + self._requires)
+
+    def __repr__(self):
+        return f"<lazy {self._module_name}.{self._name}>"
+
+
+def lazy_import(module_name, *names, requires=()):
+    """
+    Lazy equivalent of `from module_name import name1, name2`.
+    Returns one LazyAttribute for a single name, otherwise a tuple in the order given.
+    """
+    attrs = tuple(LazyAttribute(module_name, name, requires) for name in names)
+    return attrs[0] if len(attrs) == 1 else attrs
+
+
+def measure_import(module_name):
+    """Import module_name in a fresh interpreter; returns (seconds, heavy modules it pulled in)."""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'elapsed': elapsed, 'heavy': heavy}))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ImportError(f"Importing {module_name} failed:\n{result.stderr.strip()}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report['elapsed'], report['heavy']
+
+
+def check_import_budget(modules=STARTUP_MODULES, budget=IMPORT_BUDGET):
+    """Check each module imports within budget and without heavy dependencies. Returns a list of failures."""
+    failures = []
+    for module_name in modules:
+        try:
+            elapsed, heavy = measure_import(module_name)
+        except ImportError as e:
+            failures.append(str(e))
+            continue
+        print(f"{module_name}: {elapsed * 1000:.0f} ms")
+        if heavy:
+            failures.append(f"{module_name} imports heavy modules at startup: {', '.join(heavy)}")
+        if elapsed > budget:
+            failures.append(f"{module_name} took {elapsed:.2f}s to import (budget {budget:.2f}s)")
+    return failures
+
+
+if __name__ == "__main__":
+    # Import-time budget check, e.g. `python -m farmer_agent.utils.lazy_import` in CI
+    problems = check_import_budget()
+    for problem in problems:
+        print("FAIL:", problem)
+    sys.exit(1 if problems else 0)
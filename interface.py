@@ -2,8 +2,9 @@
 import os
 
 # Agentic/LLM integration imports
-from farmer_agent.nlp.cv import PlantIdentifier
-from farmer_agent.main import agentic_response
+from farmer_agent.utils.lazy_import import lazy_import
+PlantIdentifier = lazy_import('farmer_agent.nlp.cv', 'PlantIdentifier', requires=('inference_sdk',))
+agentic_response = lazy_import('farmer_agent.main', 'agentic_response')
 
 # --- ChatBubble for chat display ---
 from kivy.uix.boxlayout import BoxLayout
@@ -82,19 +83,18 @@ from kivy.uix.spinner import Spinner
 # Import all backend modules with error handling
 try:
     from farmer_agent.advisory.advisor import get_crop_advice
-    from farmer_agent.data.faq import FAQ
+    from farmer_agent.data.faq import FAQ, query_language
     from farmer_agent.data.weather import WeatherEstimator
     from farmer_agent.data.crop_calendar import CropCalendar, Reminders
-    from farmer_agent.nlp.stt import recognize_speech
-    from farmer_agent.nlp.tts import speak, list_voices
-    from farmer_agent.nlp.translate import OfflineTranslator
-    from farmer_agent.nlp.cv import PlantIdentifier
+    recognize_speech = lazy_import('farmer_agent.nlp.stt', 'recognize_speech', requires=('whisper',))
+    speak, list_voices = lazy_import('farmer_agent.nlp.tts', 'speak', 'list_voices', requires=('pyttsx3',))
+    OfflineTranslator = lazy_import('farmer_agent.nlp.translate', 'OfflineTranslator', requires=('transformers',))
     from farmer_agent.utils.file_utils import load_json
     from farmer_agent.data.user_profile import UserManager
     from farmer_agent.data.analytics import Analytics
     from farmer_agent.utils.env_loader import load_env_local
 except Exception as e:
-    get_crop_advice = FAQ = WeatherEstimator = CropCalendar = Reminders = recognize_speech = speak = list_voices = OfflineTranslator = load_json = UserManager = Analytics = load_env_local = None
+    get_crop_advice = FAQ = query_language = WeatherEstimator = CropCalendar = Reminders = recognize_speech = speak = list_voices = OfflineTranslator = load_json = UserManager = Analytics = load_env_local = None
 
 def show_debug_popup(error_msg):
     content = BoxLayout(orientation='vertical')
@@ -318,9 +318,9 @@ class ChatScreen(BoxLayout):
     def calendar_action(self, instance):
         # Interactive calendar menu using CropCalendar and Reminders
         try:
-            from farmer_agent.data.crop_calendar import CropCalendar, Reminders
-            self.calendar = CropCalendar()
-            self.reminders = Reminders()
+            from farmer_agent.data.calendar_service import get_calendar_service
+            self.calendar = get_calendar_service()
+            self.reminders = self.calendar.reminders
         except Exception as e:
             self.add_bubble(f"Calendar module error: {str(e)}", is_user=False)
             return
@@ -331,9 +331,9 @@ class ChatScreen(BoxLayout):
         option = user_text.strip()
         if not hasattr(self, 'calendar') or not hasattr(self, 'reminders'):
             try:
-                from farmer_agent.data.crop_calendar import CropCalendar, Reminders
-                self.calendar = CropCalendar()
-                self.reminders = Reminders()
+                from farmer_agent.data.calendar_service import get_calendar_service
+                self.calendar = get_calendar_service()
+                self.reminders = self.calendar.reminders
             except Exception as e:
                 self.add_bubble(f"Calendar module error: {str(e)}", is_user=False)
                 return
@@ -388,14 +388,18 @@ class ChatScreen(BoxLayout):
             try:
                 from farmer_agent.data.weather import WeatherEstimator
                 estimator = WeatherEstimator()
-                location = estimator.get_current_location()
+                place = estimator.locate()
+                location = place['name'] if place else None
                 if location:
                     result_bubbles.append((f"Detected location: {location}", False))
-                    weekly = estimator.fetch_openweather(location)
+                    weekly = estimator.fetch_openweather(place)
                     if weekly:
-                        import json
-                        result_bubbles.append((f"7-Day Weather Forecast for {location}:", False))
-                        result_bubbles.append((json.dumps(weekly, indent=2, ensure_ascii=False), False))
+                        result_bubbles.append((f"Current Weather for {location}:", False))
+                        result_bubbles.append((weekly.format(), False))
+                        days = estimator.forecast_days(place)
+                        if days:
+                            result_bubbles.append((f"{len(days)}-Day Weather Forecast for {location}:", False))
+                            result_bubbles.append(("\n".join(day.summary() for day in days), False))
                         tips = estimator.get_llm_weather_tips(weekly)
                         result_bubbles.append(("LLM Tips for Farmers:", False))
                         result_bubbles.append((tips, False))
@@ -531,9 +535,10 @@ class ChatScreen(BoxLayout):
             crop = user_text.strip()
             self.last_calendar_crop = crop
             import json
+            from datetime import datetime
             self.add_bubble("Crop Calendar:", is_user=False)
             if hasattr(self, 'calendar') and self.calendar:
-                self.add_bubble(json.dumps(self.calendar.get_schedule(crop), indent=2, ensure_ascii=False), is_user=False)
+                self.add_bubble(json.dumps(self.calendar.get_schedule(crop, datetime.now().strftime('%Y-%m-%d')), indent=2, ensure_ascii=False), is_user=False)
             self.add_bubble("Reminders:", is_user=False)
             if hasattr(self, 'reminders') and self.reminders:
                 self.add_bubble(json.dumps(self.reminders.get_upcoming(), indent=2, ensure_ascii=False), is_user=False)
@@ -655,11 +660,14 @@ class ChatScreen(BoxLayout):
                 elif self.awaiting_faq:
                     if FAQ:
                         faq = FAQ()
-                        results = faq.search(user_text, use_llm=True)
+                        results = faq.search(user_text, use_llm=True, lang=query_language(user_text))
                         if results:
                             answer = results[0].get('answer', '')
                             result_bubbles.append((f"LLM FAQ Response:", False))
                             result_bubbles.append((answer, False))
+                            related = faq.related_questions(user_text)
+                            if related:
+                                result_bubbles.append(("People also asked:\n" + "\n".join(f"• {item['question']}" for item in related), False))
                             if speak:
                                 speak(answer)
                         else:
@@ -698,7 +706,30 @@ class ChatScreen(BoxLayout):
 
 class FarmerAgentApp(App):
     def build(self):
-        return ChatScreen()
+        self.chat_screen = ChatScreen()
+        return self.chat_screen
+
+    def on_start(self):
+        # Show reminders in the chat as they come due
+        try:
+            from kivy.clock import Clock
+            from farmer_agent.data.reminder_dispatcher import get_reminder_dispatcher, log_sink
+            def notify(reminder):
+                text = f"Reminder: {reminder['activity']} {reminder['crop']} ({reminder['date']})"
+                Clock.schedule_once(lambda dt: self.chat_screen.add_bubble(text, is_user=False), 0)
+            self.reminder_dispatcher = get_reminder_dispatcher()
+            self.reminder_dispatcher.subscribe(log_sink)
+            self.reminder_dispatcher.subscribe(notify)
+            self.reminder_dispatcher.start()
+        except Exception as e:
+            print(f"Reminder dispatcher not started: {e}")
+
+    def on_stop(self):
+        if getattr(self, 'reminder_dispatcher', None):
+            self.reminder_dispatcher.stop()
+        if CropCalendar:
+            from farmer_agent.data.calendar_service import get_calendar_service
+            get_calendar_service().flush()
 
 if __name__ == "__main__":
     FarmerAgentApp().run()
@@ -711,9 +742,9 @@ if __name__ == "__main__":
             self.add_bubble("Calendar module not available.", is_user=False)
     def handle_calendar_option(self, user_text):
         option = user_text.strip()
-        from farmer_agent.data.crop_calendar import CropCalendar as CropCalendarClass, Reminders as RemindersClass
-        self.calendar = CropCalendarClass()
-        self.reminders = RemindersClass()
+        from farmer_agent.data.calendar_service import get_calendar_service
+        self.calendar = get_calendar_service()
+        self.reminders = self.calendar.reminders
         if option == "1":
             self.add_bubble("Enter crop name:", is_user=False)
             self.awaiting_calendar_crop = True
@@ -861,7 +892,7 @@ if __name__ == "__main__":
             elif self.awaiting_faq:
                 if FAQ:
                     faq = FAQ()
-                    results = faq.search(user_text)
+                    results = faq.search(user_text, lang=query_language(user_text))
                     self.add_bubble("FAQ Results:", is_user=False)
                     import json
                     self.add_bubble(json.dumps(results, indent=2, ensure_ascii=False), is_user=False)
@@ -929,9 +960,10 @@ if __name__ == "__main__":
                 crop = user_text.strip()
                 self.last_calendar_crop = crop
                 import json
+                from datetime import datetime
                 self.add_bubble("Crop Calendar:", is_user=False)
                 if self.calendar:
-                    self.add_bubble(json.dumps(self.calendar.get_schedule(crop), indent=2, ensure_ascii=False), is_user=False)
+                    self.add_bubble(json.dumps(self.calendar.get_schedule(crop, datetime.now().strftime('%Y-%m-%d')), indent=2, ensure_ascii=False), is_user=False)
                 self.add_bubble("Reminders:", is_user=False)
                 if self.reminders:
                     self.add_bubble(json.dumps(self.reminders.get_upcoming(), indent=2, ensure_ascii=False), is_user=False)
@@ -1023,7 +1055,8 @@ if __name__ == "__main__":
                     days = int(user_text.strip())
                     crop = getattr(self, 'last_calendar_crop', 'Unknown')
                     if Reminders:
-                        reminders = Reminders()
+                        from farmer_agent.data.calendar_service import get_calendar_service
+                        reminders = get_calendar_service().reminders
                         try:
                             reminders.add_reminder(crop, self.reminder_activity, days)
                             self.add_bubble("Reminder added.", is_user=False)
@@ -1087,7 +1120,7 @@ if __name__ == "__main__":
         elif 'faq' in text or 'question' in text:
             if FAQ:
                 faq = FAQ()
-                results = faq.search(text)
+                results = faq.search(text, lang=query_language(text))
                 if results:
                     return "\n".join([f"Q: {item['question']}\nA: {item['answer']}" for item in results])
                 else:
@@ -1103,9 +1136,11 @@ if __name__ == "__main__":
                 return "Weather module not available."
         elif 'calendar' in text:
             if CropCalendar:
-                calendar = CropCalendar()
+                from datetime import datetime
+                from farmer_agent.data.calendar_service import get_calendar_service
+                calendar = get_calendar_service()
                 crop = self.extract_crop(text)
-                schedule = calendar.get_schedule(crop)
+                schedule = calendar.get_schedule(crop, datetime.now().strftime('%Y-%m-%d'))
                 return f"Crop Calendar for {crop}:\n" + str(schedule)
             else:
                 return "Calendar module not available."
@@ -49,17 +49,20 @@ try:
     from farmer_agent.data.faq import FAQ
     from farmer_agent.data.weather import WeatherEstimator
     from farmer_agent.data.crop_calendar import CropCalendar, Reminders
-    from farmer_agent.nlp.stt import STT
-    from farmer_agent.nlp.tts import speak
-    from farmer_agent.nlp.translate import OfflineTranslator
-    from farmer_agent.nlp.cv import PlantIdentifier
+    from farmer_agent.data.calendar_service import get_calendar_service
+    from farmer_agent.utils.lazy_import import lazy_import
+    # Speech, translation and vision load their model libraries on first use
+    STT = lazy_import('farmer_agent.nlp.stt', 'STT', requires=('whisper',))
+    speak = lazy_import('farmer_agent.nlp.tts', 'speak', requires=('pyttsx3',))
+    OfflineTranslator = lazy_import('farmer_agent.nlp.translate', 'OfflineTranslator', requires=('transformers',))
+    PlantIdentifier = lazy_import('farmer_agent.nlp.cv', 'PlantIdentifier', requires=('inference_sdk',))
     from farmer_agent.data.user_profile import UserManager
     from farmer_agent.data.analytics import Analytics
     from farmer_agent.utils.env_loader import load_env_local
     from farmer_agent.utils.llm_utils import call_llm
 except ImportError as e:
     logging.error(f"Backend import error: {str(e)}")
-    get_crop_advice = FAQ = WeatherEstimator = CropCalendar = Reminders = STT = speak = OfflineTranslator = PlantIdentifier = UserManager = Analytics = load_env_local = call_llm = None
+    get_crop_advice = FAQ = WeatherEstimator = CropCalendar = Reminders = get_calendar_service = STT = speak = OfflineTranslator = PlantIdentifier = UserManager = Analytics = load_env_local = call_llm = None
 
 # Define custom widgets
 class Divider(MDBoxLayout):
@@ -203,8 +206,9 @@ class ChatScreen(MDBoxLayout):
     def __init__(self, **kwargs):
         super().__init__(orientation='vertical', **kwargs)
         self.state = {'mode': 'chat', 'input_type': 'text', 'language': 'en', 'context': {}}
-        self.calendar = CropCalendar() if CropCalendar else None
-        self.reminders = Reminders() if Reminders else None
+        # One shared calendar service: loaded once, reminder edits written in batches
+        self.calendar = get_calendar_service() if get_calendar_service else None
+        self.reminders = self.calendar.reminders if self.calendar else None
         self.voice_output_enabled = False
         self.detect_language = detect_language
         self.llm_translate = llm_translate
@@ -855,12 +859,13 @@ class ChatScreen(MDBoxLayout):
             result_bubbles = []
             try:
                 estimator = WeatherEstimator() # type: ignore
-                location = estimator.get_current_location()
+                place = estimator.locate()
+                location = place['name'] if place else None
                 if location:
-                    weather = estimator.fetch_openweather(location)
+                    weather = estimator.fetch_openweather(place)
                     if weather:
                         tips = estimator.get_llm_weather_tips(weather)
-                        weather_str = f"[b]Current Weather for {location}:[/b]\n" + json.dumps(weather, indent=2, ensure_ascii=False)
+                        weather_str = f"[b]Current Weather for {location}:[/b]\n" + weather.format()
                         combined = f"{weather_str}\n\n[b]Farming Tips:[/b]\n{tips}"
                         result_bubbles.append((combined, False))
                     else:
@@ -992,7 +997,7 @@ class ChatScreen(MDBoxLayout):
                 self.state["context"]["last_calendar_crop"] = crop
                 self.add_bubble("Crop Calendar:", is_user=False)
                 if self.calendar:
-                    self.add_bubble(json.dumps(self.calendar.get_schedule(crop), indent=2, ensure_ascii=False), is_user=False)
+                    self.add_bubble(json.dumps(self.calendar.get_schedule(crop, datetime.now().strftime('%Y-%m-%d')), indent=2, ensure_ascii=False), is_user=False)
                 self.add_bubble("Reminders:", is_user=False)
                 if self.reminders:
                     self.add_bubble(json.dumps(self.reminders.get_upcoming(), indent=2, ensure_ascii=False), is_user=False)
@@ -1114,7 +1119,7 @@ class ChatScreen(MDBoxLayout):
                     result_bubbles = []
                     try:
                         faq = FAQ() # type: ignore
-                        results = faq.search(user_text, use_llm=True)
+                        results = faq.search(user_text, use_llm=True, lang=self.state.get('language', 'en'))
                         if results:
                             answer = results[0].get('answer', '')
                             result_bubbles.append(("LLM FAQ Response:", False))
@@ -1229,7 +1234,29 @@ class ChatScreen(MDBoxLayout):
 
 class FarmerAgentApp(MDApp):
     def build(self):
-        return ChatScreen()
+        self.chat_screen = ChatScreen()
+        return self.chat_screen
+
+    def on_start(self):
+        # Show reminders in the chat as they come due
+        try:
+            from kivy.clock import Clock
+            from farmer_agent.data.reminder_dispatcher import get_reminder_dispatcher, log_sink
+            def notify(reminder):
+                text = f"Reminder: {reminder['activity']} {reminder['crop']} ({reminder['date']})"
+                Clock.schedule_once(lambda dt: self.chat_screen.add_bubble(text, is_user=False), 0)
+            self.reminder_dispatcher = get_reminder_dispatcher()
+            self.reminder_dispatcher.subscribe(log_sink)
+            self.reminder_dispatcher.subscribe(notify)
+            self.reminder_dispatcher.start()
+        except Exception as e:
+            print(f"Reminder dispatcher not started: {e}")
+
+    def on_stop(self):
+        if getattr(self, 'reminder_dispatcher', None):
+            self.reminder_dispatcher.stop()
+        if get_calendar_service:
+            get_calendar_service().flush()
 
 if __name__ == "__main__":
     FarmerAgentApp().run()
\ No newline at end of file